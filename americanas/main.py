@@ -1,30 +1,93 @@
 import os
 import sys
 import random
+import logging
+import argparse
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from utils.americanas_functions import Americanas
-from utils.database_functions import connect_database, insert_into_americanas_database, get_mercado_livre_codes_from_database
+from utils.database_functions import database_connection, insert_into_americanas_database, insert_dataframes, get_resolved_links, create_matching_indexes, get_matching_products
 from utils.json_functions import load_json_file
+from utils.cache_functions import HttpCache
+from utils.retry_functions import RetryPolicy
+from utils.metrics_functions import metrics
+from utils.sink_functions import open_sink
+from utils.archive_functions import PageArchive
 from dotenv import load_dotenv
 
 
-load_dotenv()
-headers = load_json_file(os.getenv('credentials_path'))[2]
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--resume', action='store_true', help='Continua a coleta a partir do último checkpoint.')
+    parser.add_argument('--metrics-port', type=int, help='Expõe as métricas no formato do Prometheus nesta porta durante a coleta.')
+    parser.add_argument('--output', help='Também grava os produtos, em lotes, em um arquivo .csv ou em um diretório Parquet.')
+    parser.add_argument('--stream', action='store_true', help='Não guarda os produtos em memória: eles ficam só no --output e são lidos de volta, em partes, na carga do banco.')
+    parser.add_argument('--archive', help='Diretório onde o HTML baixado é guardado (e lido no modo --reextract).')
+    parser.add_argument('--reextract', action='store_true', help='Refaz a extração a partir do --archive, sem requisições.')
+    parser.add_argument('--day', help='No modo --reextract, usa apenas as páginas baixadas nesse dia (AAAA-MM-DD).')
+    parser.add_argument('--matches', default=os.path.join(os.path.dirname(__file__), 'matching_products.csv'),
+                        help='Arquivo .csv onde são gravados os produtos encontrados nas duas lojas, com o preço de cada uma.')
+    parser.add_argument('--threads', type=int, default=2, help='Threads que baixam as páginas de produto.')
+    parser.add_argument('--parallel-listing', action='store_true', help='Baixa as páginas de listagem em paralelo, em lotes de --listing-threads páginas.')
+    parser.add_argument('--listing-threads', type=int, default=4, help='Páginas de listagem baixadas ao mesmo tempo com --parallel-listing.')
+    parser.add_argument('--parse-mode', choices=['thread', 'process'], default='thread', help="Com 'process', o parse das páginas roda em um pool de processos, separado das threads de rede.")
+    parser.add_argument('--parse-processes', type=int, help="Processos do pool de parse no modo 'process'. Por padrão, um por CPU.")
+    parser.add_argument('--engine', choices=['threads', 'async'], default='threads', help="Motor de coleta. Com 'async', as requisições rodam em um único event loop.")
+    parser.add_argument('--async-concurrency', type=int, default=200, help="Requisições em andamento ao mesmo tempo no motor 'async'.")
+    parser.add_argument('--hedge-after', type=float, help='Dispara uma segunda requisição, por outro proxy, quando a primeira passa desse número de segundos.')
+    parser.add_argument('--log-level', default='INFO', help='Nível de log (DEBUG mostra cada página de listagem).')
+    args = parser.parse_args()
+    if args.reextract and not args.archive:
+        parser.error('--reextract precisa do --archive')
+    if args.stream and not args.output:
+        parser.error('--stream precisa do --output')
 
-americanas = Americanas(url = ('https://www.americanas.com.br/categoria/celulares-e-smartphones/g/condicao-novo/tipo-de-produto-celular/tipo-de-produto-Smartphone?viewMode=list'), 
-                     headers = headers, 
-                     num_threads = 2)
-    
-americanas_df = americanas.main()
+    logging.basicConfig(level=args.log_level.upper(), format='%(asctime)s %(levelname)s %(message)s')
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
 
-connection = connect_database()
+    load_dotenv()
+    headers = load_json_file(os.getenv('credentials_path'))[2]
 
-ml_codes = get_mercado_livre_codes_from_database(connection=connection)
+    with database_connection() as connection:
+        known_products = get_resolved_links(connection=connection, table='americanas')
 
-matching_codes = americanas.americanas_mercado_livre_matching_codes(df_americanas=americanas_df, df_mercadoLivre=ml_codes)
+    americanas = Americanas(url = ('https://www.americanas.com.br/categoria/celulares-e-smartphones/g/condicao-novo/tipo-de-produto-celular/tipo-de-produto-Smartphone?viewMode=list'), 
+                         headers = headers, 
+                         num_threads = args.threads,
+                         parallel_listing = args.parallel_listing,
+                         listing_threads = args.listing_threads,
+                         parse_mode = args.parse_mode,
+                         parse_processes = args.parse_processes,
+                         async_concurrency = args.async_concurrency,
+                         retry_policy = RetryPolicy(hedge_after = args.hedge_after),
+                         cache = HttpCache(os.path.join(os.path.dirname(__file__), '.cache')),
+                         known_products = known_products,
+                         checkpoint_path = os.path.join(os.path.dirname(__file__), 'checkpoint.json'),
+                         sink = open_sink(args.output) if args.output else None,
+                         keep_rows = not args.stream,
+                         archive = PageArchive(args.archive) if args.archive and not args.reextract else None)
 
-connection = connect_database()
+    if args.reextract:
+        americanas_df = americanas.reextract(PageArchive(args.archive), day = args.day)
+    else:
+        americanas_df = americanas.main(resume = args.resume, engine = args.engine)
 
-insert_into_americanas_database(connection = connection, df_americanas= americanas_df)
+    with database_connection() as connection:
+        if args.stream:
+            insert_dataframes(connection=connection, table='americanas', frames=americanas.read_results())
+        else:
+            insert_into_americanas_database(connection = connection, df_americanas= americanas_df)
 
-1
\ No newline at end of file
+        create_matching_indexes(connection=connection)
+
+        matching_products = get_matching_products(connection=connection)
+
+    matching_products.to_csv(args.matches, index=False)
+    logging.info(f'{len(matching_products)} produtos encontrados nas duas lojas, gravados em {args.matches}')
+
+    metrics.write_prometheus(os.path.join(os.path.dirname(__file__), 'metrics.prom'))
+    metrics.write_summary(os.path.join(os.path.dirname(__file__), 'metrics.json'))
+
+
+if __name__ == '__main__':
+    main()
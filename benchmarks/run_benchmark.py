@@ -0,0 +1,161 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import platform
+import resource
+import subprocess
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from benchmarks.stub_server import StubServer, load_fixture, fixture_name
+from utils import americanas_functions, mercado_livre_functions
+from utils.americanas_functions import Americanas
+from utils.mercado_livre_functions import MercadoLivre
+from utils.database_functions import insert_dataframe
+from utils.metrics_functions import metrics
+from utils.proxy_functions import ProxyManager
+from utils.rate_limit_functions import RateLimiter
+from utils.retry_functions import RetryPolicy
+
+
+def measure_parse(parse_function, content, iterations):
+    """Tempo médio, em milissegundos, para fazer o parse de uma página."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        parse_function(content)
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def open_database(dsn):
+    """
+    Abre a conexão usada no benchmark do banco. Com 'pgserver', sobe um Postgres descartável em um
+    diretório temporário (pip install pgserver); qualquer outro valor é a DSN de um Postgres existente.
+    """
+    import psycopg2
+
+    if dsn == 'pgserver':
+        import pgserver
+        dsn = pgserver.get_server(tempfile.mkdtemp(prefix='benchmark-pg-'), cleanup_mode='delete').get_uri()
+    return psycopg2.connect(dsn)
+
+
+def measure_database(connection, table, df):
+    """
+    Insere o dataframe pelo mesmo caminho da coleta (insert_dataframe: lotes com execute_values e savepoints)
+    em uma tabela temporária com o nome da tabela real, e retorna linhas por segundo. A transação é desfeita
+    no fim, então nada fica gravado no banco.
+    """
+    cursor = connection.cursor()
+    cursor.execute(f'CREATE TEMPORARY TABLE {table} (codigo text, nome text, marca text, valor numeric, link text)')
+
+    start = time.perf_counter()
+    failed_rows = insert_dataframe(connection, table, df, commit=False)
+    elapsed = time.perf_counter() - start
+    connection.rollback()
+
+    if failed_rows:
+        return None
+    return len(df) / elapsed if elapsed else None
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(__file__)).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_marketplace(name, args, connection=None):
+    """
+    Roda o scraper do marketplace contra o servidor local e retorna as métricas da execução.
+    Com 'connection', mede também a inserção das linhas coletadas no Postgres.
+    """
+    metrics.reset()
+    stub = StubServer(latency=args.latency, error_rate=args.error_rate, throttle_rate=args.throttle_rate, pages=args.pages,
+                      fixtures=args.fixtures).start()
+    options = dict(headers={},
+                   num_threads=args.threads,
+                   parallel_listing=args.parallel_listing,
+                   listing_threads=args.listing_threads,
+                   rate_limiter=RateLimiter(initial_rate=args.rate, max_rate=args.rate, burst=args.threads),
+                   proxy_manager=ProxyManager([]),
+                   retry_policy=RetryPolicy(base_delay=0.05),
+                   parse_mode=args.parse_mode)
+
+    if name == 'americanas':
+        table = 'americanas'
+        scraper = Americanas(url=f'{stub.base_url}/americanas/listing?viewMode=list', base_url=f'{stub.base_url}/americanas', **options)
+        scraper.amount_of_products = (args.pages - 1) * scraper.limit
+        listing, product = load_fixture(fixture_name('americanas_listing', args.fixtures)), load_fixture(fixture_name('americanas_product', args.fixtures))
+        parse_listing, parse_product = americanas_functions.parse_listing_page, americanas_functions.parse_product_page
+    else:
+        table = 'mercadoLivre'
+        scraper = MercadoLivre(url=f'{stub.base_url}/mercado_livre/', **options)
+        scraper.amount_of_products = 1 + (args.pages - 1) * 50
+        listing, product = load_fixture(fixture_name('mercado_livre_listing', args.fixtures)), load_fixture(fixture_name('mercado_livre_product', args.fixtures))
+        parse_listing, parse_product = mercado_livre_functions.parse_listing_page, mercado_livre_functions.parse_product_page
+
+    start = time.perf_counter()
+    df = scraper.main(engine=args.engine)
+    elapsed = time.perf_counter() - start
+    stub.stop()
+
+    return {'wall_seconds': elapsed,
+            'requests': stub.counters['requests'],
+            'pages_per_second': stub.counters['requests'] / elapsed,
+            'bytes_downloaded': stub.counters['bytes'],
+            'injected_errors': stub.counters['errors'],
+            'injected_429': stub.counters['throttled'],
+            'rows': len(df),
+            'rows_per_second': len(df) / elapsed,
+            'failed_links': len(scraper.failed_links),
+            'parse_ms_listing_page': measure_parse(parse_listing, listing, args.parse_iterations),
+            'parse_ms_product_page': measure_parse(parse_product, product, args.parse_iterations),
+            'db_rows_per_second': measure_database(connection, table, df) if connection is not None and len(df) else None,
+            'metrics': metrics.summary()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark offline dos scrapers contra um servidor HTTP local.')
+    parser.add_argument('--marketplace', choices=['americanas', 'mercado_livre', 'all'], default='all')
+    parser.add_argument('--pages', type=int, default=5, help='Quantidade de páginas de listagem servidas.')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--listing-threads', type=int, default=4)
+    parser.add_argument('--parallel-listing', action='store_true')
+    parser.add_argument('--engine', choices=['threads', 'async'], default='threads')
+    parser.add_argument('--parse-mode', choices=['thread', 'process'], default='thread')
+    parser.add_argument('--rate', type=float, default=1000, help='Requisições por segundo permitidas por host.')
+    parser.add_argument('--latency', type=float, default=0.05, help='Latência simulada por requisição, em segundos.')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fração de respostas 500.')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fração de respostas 429.')
+    parser.add_argument('--parse-iterations', type=int, default=50)
+    parser.add_argument('--database-dsn', help="Postgres onde medir a inserção (insert_dataframe), ou 'pgserver' para "
+                                               "um Postgres descartável local. Sem ele, a etapa do banco não é medida.")
+    parser.add_argument('--fixtures', choices=['html', 'json'], default='json',
+                        help="Páginas servidas: 'json' (com o JSON embutido, como as páginas reais) ou 'html' (só o DOM).")
+    parser.add_argument('--output', help='Arquivo JSON onde o resultado será salvo.')
+    args = parser.parse_args()
+
+    marketplaces = ['americanas', 'mercado_livre'] if args.marketplace == 'all' else [args.marketplace]
+    connection = open_database(args.database_dsn) if args.database_dsn else None
+    result = {'revision': git_revision(),
+              'python': platform.python_version(),
+              'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+              'parameters': vars(args),
+              'results': {name: run_marketplace(name, args, connection) for name in marketplaces},
+              # ru_maxrss é informado em KB no Linux
+              'peak_memory_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+    if connection is not None:
+        connection.close()
+
+    output = json.dumps(result, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+import os
+import random
+import re
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), 'rb') as file:
+        return file.read()
+
+
+def fixture_name(page, fixtures='html'):
+    """Nome do arquivo da página ('americanas_listing', ...) no conjunto 'html' ou 'json'."""
+    return f'{page}.html' if fixtures == 'html' else f'{page}_{fixtures}.html'
+
+
+class StubServer():
+    """
+    Servidor HTTP local que responde com páginas reconstruídas da Americanas e do Mercado Livre (mesma
+    estrutura de classes, tamanho e blocos de JSON das páginas reais, com produtos fictícios).
+    Permite simular latência, erros 500 e respostas 429 para medir os scrapers sem acessar os sites.
+    Com fixtures='json', serve as versões das páginas com o JSON embutido (JSON-LD e estado da página),
+    que os scrapers leem sem montar o soup; com 'html', só o DOM, para medir o caminho do soup.
+
+        Rotas:
+                /americanas/listing?page=N&limit=24&offset=M   Página de listagem da Americanas.
+                /americanas/produto/<id>                        Página de produto da Americanas.
+                /mercado_livre/celular_Desde_N_NoIndex_True     Página de listagem do Mercado Livre.
+                /mercado_livre/<slug>/p/MLB<id>                 Página de produto do Mercado Livre.
+    """
+
+    def __init__(self, port=0, latency=0.0, error_rate=0.0, throttle_rate=0.0, pages=30, fixtures='html'):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.pages = pages
+        self.fixtures = {name: load_fixture(fixture_name(name, fixtures)) for name in
+                         ('americanas_listing', 'americanas_product', 'mercado_livre_listing', 'mercado_livre_product')}
+        self.empty_page = b'<html><body><main></main></body></html>'
+        self.counters = {'requests': 0, 'bytes': 0, 'errors': 0, 'throttled': 0}
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), self.make_handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address
+        return f'http://{host}:{port}'
+
+    def make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                status, body = stub.respond(self.path)
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def respond(self, path):
+        """Monta a resposta da rota, aplicando latência e injeção de erros."""
+        if self.latency:
+            time.sleep(self.latency)
+
+        draw = random.random()
+        with self.lock:
+            self.counters['requests'] += 1
+            if draw < self.throttle_rate:
+                self.counters['throttled'] += 1
+                return 429, b'Too Many Requests'
+            if draw < self.throttle_rate + self.error_rate:
+                self.counters['errors'] += 1
+                return 500, b'Internal Server Error'
+
+        status, body = 200, self.route(path)
+        with self.lock:
+            self.counters['bytes'] += len(body)
+        return status, body
+
+    def route(self, path):
+        parts = urlsplit(path)
+
+        if parts.path.startswith('/americanas/listing'):
+            page = int(parse_qs(parts.query).get('page', ['1'])[0])
+            return self.listing('americanas_listing', page)
+
+        if parts.path.startswith('/americanas/produto/'):
+            return self.fixtures['americanas_product'].replace(b'__PAGE__', parts.path.rsplit('/', 1)[1].encode())
+
+        match = re.search(r'celular_Desde_(\d+)_NoIndex_True', parts.path)
+        if match:
+            page = int(match.group(1)) // 50 + 1
+            return self.listing('mercado_livre_listing', page)
+
+        match = re.search(r'/p/MLB(\d+)', parts.path)
+        if match:
+            return self.fixtures['mercado_livre_product'].replace(b'__PAGE__', match.group(1).encode())
+
+        return self.empty_page
+
+    def listing(self, name, page):
+        """Página de listagem com links únicos por página; depois de 'pages' páginas, a listagem vem vazia."""
+        if page > self.pages:
+            return self.empty_page
+        return (self.fixtures[name].replace(b'__PAGE__', str(page).encode())
+                                   .replace(b'__BASE__', f'{self.base_url}/mercado_livre'.encode()))
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,56 @@
+import os
+import sys
+import json
+import logging
+import argparse
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.orchestrator_functions import build_tasks, crawl_shards
+from utils.work_queue_functions import FileWorkQueue, DatabaseWorkQueue
+from utils.database_functions import database_connection, insert_into_americanas_database, insert_into_mercado_livre_database
+from utils.json_functions import load_json_file
+
+
+
+def main():
+    # Os workers são processos 'spawn', que importam este arquivo de novo: a coleta só roda pela chamada abaixo
+    parser = argparse.ArgumentParser(description='Coleta distribuída: divide as categorias de cada marketplace em shards entre processos e máquinas.')
+    parser.add_argument('--categories', default=os.path.join(os.path.dirname(__file__), 'categories.json'), help='JSON com a lista de URLs de categoria/filtro de cada marketplace.')
+    parser.add_argument('--queue', default=os.path.join(os.path.dirname(__file__), 'queue'), help='Diretório da fila de tarefas (pode ser compartilhado entre máquinas).')
+    parser.add_argument('--queue-db', action='store_true', help='Usa uma fila em tabela do banco em vez do diretório.')
+    parser.add_argument('--enqueue', action='store_true', help='Acrescenta à fila uma nova geração de tarefas, uma por URL do --categories. Cada geração tem a sua própria fronteira.')
+    parser.add_argument('--max-products', type=int, help='Limite de produtos por categoria. Por padrão, percorre a categoria inteira.')
+    parser.add_argument('--processes', type=int, default=2, help='Processos worker nesta máquina. Com 0, apenas enfileira.')
+    parser.add_argument('--output', help='Diretório onde cada shard grava seus produtos em Parquet.')
+    parser.add_argument('--report', default=os.path.join(os.path.dirname(__file__), 'shards.json'), help='JSON com as estatísticas de cada shard.')
+    parser.add_argument('--log-level', default='INFO', help='Nível de log.')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper(), format='%(asctime)s %(levelname)s %(message)s')
+
+    if args.queue_db:
+        work_queue = DatabaseWorkQueue()
+        work_queue.create_table()
+    else:
+        work_queue = FileWorkQueue(args.queue)
+
+    if args.enqueue:
+        for task in build_tasks(load_json_file(args.categories), max_products=args.max_products):
+            work_queue.put(task)
+
+    options = {'americanas': {'num_threads': 2, 'cache_dir': os.path.join(os.path.dirname(__file__), '..', 'americanas', '.cache'), 'output': args.output},
+               'mercado_livre': {'num_threads': 3, 'cache_dir': os.path.join(os.path.dirname(__file__), '..', 'mercado_livre', '.cache'), 'output': args.output}}
+
+    if args.processes > 0:
+        dataframes, stats = crawl_shards(work_queue, options, processes=args.processes)
+
+        # Cada máquina grava apenas os shards que processou; a fronteira da fila garante que não se repetem
+        with database_connection() as connection:
+            insert_into_americanas_database(connection=connection, df_americanas=dataframes['americanas'])
+            insert_into_mercado_livre_database(connection=connection, df_ml=dataframes['mercado_livre'])
+
+        with open(args.report, 'w', encoding='utf-8') as file:
+            json.dump(stats, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+import os
+import sys
+import logging
+import argparse
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.pipeline_functions import run_pipeline
+from utils.metrics_functions import metrics
+from utils.cache_functions import HttpCache
+from utils.retry_functions import RetryPolicy
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Coleta a Americanas e o Mercado Livre ao mesmo tempo, cruza os produtos em memória e grava tudo de uma vez.')
+    parser.add_argument('--resume', action='store_true', help='Continua as coletas a partir dos últimos checkpoints.')
+    parser.add_argument('--metrics-port', type=int, help='Expõe as métricas no formato do Prometheus nesta porta durante a coleta.')
+    parser.add_argument('--threads', type=int, help='Threads que baixam as páginas de produto em cada marketplace. Por padrão, 2 na Americanas e 3 no Mercado Livre.')
+    parser.add_argument('--parallel-listing', action='store_true', help='Baixa as páginas de listagem em paralelo, em lotes de --listing-threads páginas.')
+    parser.add_argument('--listing-threads', type=int, default=4, help='Páginas de listagem baixadas ao mesmo tempo com --parallel-listing.')
+    parser.add_argument('--parse-mode', choices=['thread', 'process'], default='thread', help="Com 'process', o parse das páginas roda em um pool de processos, separado das threads de rede.")
+    parser.add_argument('--parse-processes', type=int, help="Processos do pool de parse no modo 'process'. Por padrão, um por CPU.")
+    parser.add_argument('--engine', choices=['threads', 'async'], default='threads', help="Motor de coleta. Com 'async', as requisições rodam em um único event loop.")
+    parser.add_argument('--async-concurrency', type=int, default=200, help="Requisições em andamento ao mesmo tempo no motor 'async'.")
+    parser.add_argument('--hedge-after', type=float, help='Dispara uma segunda requisição, por outro proxy, quando a primeira passa desse número de segundos.')
+    parser.add_argument('--log-level', default='INFO', help='Nível de log (DEBUG mostra cada página de listagem).')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper(), format='%(asctime)s %(levelname)s %(message)s')
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+    urls = {'americanas': 'https://www.americanas.com.br/categoria/celulares-e-smartphones/g/condicao-novo/tipo-de-produto-celular/tipo-de-produto-Smartphone?viewMode=list',
+            'mercado_livre': 'https://lista.mercadolivre.com.br/celulares-telefones/celulares-smartphones/novo/'}
+
+    # Mesmos caches e checkpoints dos scripts de cada marketplace
+    options = {'americanas': {'num_threads': args.threads or 2,
+                              'cache': HttpCache(os.path.join(root, 'americanas', '.cache')),
+                              'checkpoint_path': os.path.join(root, 'americanas', 'checkpoint.json')},
+               'mercado_livre': {'num_threads': args.threads or 3,
+                                 'cache': HttpCache(os.path.join(root, 'mercado_livre', '.cache')),
+                                 'checkpoint_path': os.path.join(root, 'mercado_livre', 'checkpoint.json')}}
+    for marketplace_options in options.values():
+        marketplace_options.update(parallel_listing=args.parallel_listing, listing_threads=args.listing_threads,
+                                   parse_mode=args.parse_mode, parse_processes=args.parse_processes,
+                                   async_concurrency=args.async_concurrency,
+                                   retry_policy=RetryPolicy(hedge_after=args.hedge_after))
+
+    dataframes, matching_products = run_pipeline(urls, options, resume=args.resume, engine=args.engine)
+
+    metrics.write_prometheus(os.path.join(os.path.dirname(__file__), 'metrics.prom'))
+    metrics.write_summary(os.path.join(os.path.dirname(__file__), 'metrics.json'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Paridade entre os seletores originais dos scrapers (soup completo com html.parser, como na primeira versão)
+e as funções de parse atuais (SoupStrainer, lxml e JSON embutido), sobre as páginas de benchmarks/fixtures.
+"""
+import html
+import pytest
+from bs4 import BeautifulSoup
+from benchmarks.stub_server import load_fixture, fixture_name
+from utils import americanas_functions, mercado_livre_functions
+from utils.parsing_functions import code_and_brand
+
+FIXTURE_SETS = ['html', 'json']
+PAGE = '7'
+BASE = 'https://www.mercadolivre.com.br'
+
+
+def render(page, fixtures):
+    """Página da fixture com os marcadores substituídos, como o StubServer faz."""
+    return load_fixture(fixture_name(page, fixtures)).replace(b'__PAGE__', PAGE.encode()).replace(b'__BASE__', BASE.encode())
+
+
+def unique(rows):
+    """A versão original adicionava alguns produtos duas vezes; a comparação usa a primeira ocorrência de cada link."""
+    seen = set()
+    return [row for row in rows if row['link'] not in seen and not seen.add(row['link'])]
+
+
+def baseline_americanas_listing(content):
+    soup = BeautifulSoup(content, 'html.parser')
+    rows = []
+    for p in soup.find_all('div', attrs={'class':'col__StyledCol-sc-1snw5v3-0 qYCYL theme-grid-col'}):
+        title = p.find('h3', attrs={'class':'styles__Name-sc-1e4r445-0 fYqJrQ product-name'}).text
+        price_element = p.find('span', attrs={'class':'src__Text-sc-154pg0p-0 styles__PromotionalPrice-sc-yl2rbe-0 dthYGD list-price'})
+        if price_element:
+            price = float(price_element.text.strip().replace('.', '').replace(',', '.').replace('R$', ''))
+            link = "https://www.americanas.com.br" + p.find('a', attrs={'aria-current':'page'})['href']
+            rows.append({'title': title, 'price': price, 'link': link})
+    return rows
+
+
+def baseline_americanas_product(content):
+    soup = BeautifulSoup(content, 'html.parser')
+    code, brand = None, None
+    for tag in soup.find_all('td', class_='spec-drawer__Text-sc-jcvy3q-5 fMwSYd'):
+        if any(substring in tag.get_text(strip=True) for substring in ['Código de homologação (Anatel', 'Codigo Homolog (ANATEL)']):
+            tag_code = tag.find_next('td', class_='spec-drawer__Text-sc-jcvy3q-5 fMwSYd')
+            code = tag_code.text.replace('-', '') if tag_code else None
+        if 'Marca' in tag.get_text(strip=True):
+            tag_brand = soup.find('td', string='Marca')
+            brand = tag_brand.find_next('td').text.strip() if tag_brand else None
+    return code, brand
+
+
+def baseline_mercado_livre_listing(content):
+    soup = BeautifulSoup(content, 'html.parser')
+    rows = []
+    for p in soup.find_all('div', attrs={'class':'andes-card ui-search-result ui-search-result--core andes-card--flat andes-card--padding-16'}):
+        title = p.find('h2', attrs={'class':'ui-search-item__title ui-search-item__group__element'}).text
+        price_str = p.find('span', attrs={'class':'andes-money-amount__fraction'})
+        if price_str is None:
+            break
+        price = float(price_str.text.replace('.', '').replace(',', '.').replace('R$', ''))
+        link_tag = p.find('a', attrs={'class':'ui-search-link__title-card ui-search-link'})
+        if link_tag:
+            rows.append({'title': title, 'price': price, 'link': html.unescape(link_tag['href'])})
+    return rows
+
+
+def baseline_mercado_livre_product(content):
+    soup = BeautifulSoup(content, 'html.parser')
+    code, brand = None, None
+    for tag in soup.find_all('div', class_='andes-table__header__container'):
+        if any(substring in tag.get_text(strip=True) for substring in mercado_livre_functions.CODE_LABELS):
+            tag_code = tag.find_next('span', class_='andes-table__column--value')
+            code = tag_code.text.replace('-', '') if tag_code is not None else None
+        if 'Marca' in tag.get_text(strip=True):
+            tag_brand = soup.find('th', string='Marca')
+            brand = tag_brand.find_next('td').text.strip() if tag_brand else None
+    return code, brand
+
+
+@pytest.mark.parametrize('fixtures', FIXTURE_SETS)
+def test_americanas_listing_parity(fixtures):
+    content = render('americanas_listing', fixtures)
+    rows, amount, has_next = americanas_functions.parse_listing_page(content)
+
+    expected = unique(baseline_americanas_listing(content))
+    assert expected
+    assert rows == expected
+    assert amount == len(expected)
+    assert has_next
+
+
+@pytest.mark.parametrize('fixtures', FIXTURE_SETS)
+def test_americanas_product_parity(fixtures):
+    content = render('americanas_product', fixtures)
+    specs = americanas_functions.parse_product_page(content)
+
+    expected = baseline_americanas_product(content)
+    assert expected[0] is not None and expected[1] is not None
+    assert code_and_brand(specs, americanas_functions.CODE_LABELS) == expected
+
+
+@pytest.mark.parametrize('fixtures', FIXTURE_SETS)
+def test_mercado_livre_listing_parity(fixtures):
+    content = render('mercado_livre_listing', fixtures)
+    rows, amount, has_next = mercado_livre_functions.parse_listing_page(content)
+
+    expected = unique(baseline_mercado_livre_listing(content))
+    assert expected
+    assert rows == expected
+    assert amount == len(expected)
+    assert has_next
+
+
+@pytest.mark.parametrize('fixtures', FIXTURE_SETS)
+def test_mercado_livre_product_parity(fixtures):
+    content = render('mercado_livre_product', fixtures)
+    specs = mercado_livre_functions.parse_product_page(content)
+
+    expected = baseline_mercado_livre_product(content)
+    assert expected[0] is not None and expected[1] is not None
+    assert code_and_brand(specs, mercado_livre_functions.CODE_LABELS) == expected
@@ -1,155 +1,149 @@
-import requests
-import os
-import pandas as pd
-import threading
-import queue
-import random
-import time
-from utils.json_functions import load_json_file
-from bs4 import BeautifulSoup
-from concurrent.futures import ThreadPoolExecutor
-from dotenv import load_dotenv
-
-
-load_dotenv()
-dynamic_proxies_list = load_json_file(os.getenv('credentials_path'))[1]['proxies']
-def get_random_proxy():
-    return random.choice(dynamic_proxies_list)
-
-class Americanas():
+from itertools import count
+from utils.crawler_functions import Crawler
+from utils.parsing_functions import make_soup, code_and_brand, AMERICANAS_LISTING_STRAINER, AMERICANAS_PRODUCT_STRAINER
+from utils.embedded_json_functions import decode_content, extract_listing_products, extract_embedded_specs
+
+BASE_URL = 'https://www.americanas.com.br'
+SPEC_CLASS = 'spec-drawer__Text-sc-jcvy3q-5 fMwSYd'
+NEXT_PAGE_CLASS = 'src__PageLink-sc-82ugau-3 exDCiw'
+CODE_LABELS = ['Código de homologação (Anatel', 'Codigo Homolog (ANATEL)']
+
+
+def extract_products(soup, base_url=BASE_URL):
+    """Extrai título, preço e link dos cards de uma página de listagem. Retorna as linhas e a quantidade de cards."""
+    rows = []
+    products = soup.find_all('div', attrs={'class':'col__StyledCol-sc-1snw5v3-0 qYCYL theme-grid-col'})
+
+    for p in products:
+        title = p.find('h3', attrs={'class':'styles__Name-sc-1e4r445-0 fYqJrQ product-name'}).text
+        price_element = p.find('span', attrs={'class':'src__Text-sc-154pg0p-0 styles__PromotionalPrice-sc-yl2rbe-0 dthYGD list-price'})
+
+        if price_element:
+            price_str = price_element.text.strip()
+            price = float(price_str.replace('.', '').replace(',', '.').replace('R$', ''))
+            href = p.find('a', attrs={'aria-current':'page'})['href']
+            rows.append({'title': title, 'price': price, 'link': base_url + href})
+
+    return rows, len(products)
+
+
+def has_next_page(soup):
+    """Verifica se a página de listagem tem o botão de próxima página."""
+    return soup.find('a', {'class':NEXT_PAGE_CLASS}) is not None
+
+
+def extract_specs(soup):
+    """Lê a tabela de especificações em uma única passada, linha a linha (nome na primeira célula e valor na segunda)."""
+    specs = {}
+    for row in soup.find_all('tr'):
+        cells = row.find_all('td', class_=SPEC_CLASS, limit=2)
+        if len(cells) == 2:
+            specs.setdefault(cells[0].get_text(strip=True), cells[1].get_text(strip=True))
+    return specs
+
+
+def extract_anatel_code_and_brand(soup):
+    """Extrai o código ANATEL e a marca da tabela de especificações de um produto."""
+    return code_and_brand(extract_specs(soup), CODE_LABELS)
+
+
+def product_link(href, base_url=BASE_URL):
+    """Completa os links relativos do site com o endereço base."""
+    return base_url + href if href.startswith('/') else href
+
+
+def parse_listing_page(content, base_url=BASE_URL):
+    """
+    Faz o parse de uma página de listagem. Por ser uma função de módulo, pode rodar em um pool de processos.
+    Usa o JSON embutido na página e só monta o soup (classes CSS) quando ele não existe.
+    """
+    text = decode_content(content)
+    rows = extract_listing_products(text)
+    if rows is not None:
+        rows = [{**row, 'link': product_link(row['link'], base_url)} for row in rows]
+        return rows, len(rows), NEXT_PAGE_CLASS in text
+
+    soup = make_soup(content, parse_only=AMERICANAS_LISTING_STRAINER)
+    rows, amount = extract_products(soup, base_url)
+    return rows, amount, has_next_page(soup)
+
+
+def parse_product_page(content):
+    """
+    Faz o parse de uma página de produto e retorna todas as especificações (nome -> valor). Pode rodar em um pool de processos.
+    Usa o JSON embutido na página; a tabela de especificações só é lida se o código não estiver nele.
+    """
+    specs = extract_embedded_specs(content)
+    if code_and_brand(specs, CODE_LABELS)[0] is None:
+        specs = {**extract_specs(make_soup(content, parse_only=AMERICANAS_PRODUCT_STRAINER)), **specs}
+    return specs
+
+
+class Americanas(Crawler):
     """Classe para realizar webScraping no site da Americanas."""
-    
-    def __init__(self, url, headers, num_threads):
-        self.url = url
-        self.headers = headers
-        self.num_threads = num_threads
-        self.products_links_queue = queue.Queue()
-        self.codes_dict = {}
-        self.codes_lock = threading.Lock()
-        self.brand_dict = {}
-        self.brand_lock = threading.Lock()
-        self.all_rows = []
+
+    # Label usado nas métricas
+    name = 'americanas'
+    display_name = 'Americanas'
+    code_labels = CODE_LABELS
+    listing_parser = staticmethod(parse_listing_page)
+    product_parser = staticmethod(parse_product_page)
+    listing_fetch_options = {'verify': False}
+
+    def __init__(self, url, headers, num_threads, base_url=BASE_URL, amount_of_products=840, **kwargs):
+        # 840 = 30 páginas. Com None, a paginação segue até a última página da categoria
+        super().__init__(url, headers, num_threads, amount_of_products=amount_of_products, **kwargs)
+        # Endereço usado para montar o link absoluto de cada produto
+        self.base_url = base_url
         self.limit = 24
         self.offset = 0
         self.page = 1
-        self.amount_of_products = 840 #30 Páginas
 
     def get_products(self, soup):
-        """Extrai informações de título, preço e link de produtos da página."""
-        products = soup.findAll('div', attrs={'class':'col__StyledCol-sc-1snw5v3-0 qYCYL theme-grid-col'})
-
-        for p in products:
-            title = p.find('h3', attrs={'class':'styles__Name-sc-1e4r445-0 fYqJrQ product-name'}).text
-            price_element = p.find('span', attrs={'class':'src__Text-sc-154pg0p-0 styles__PromotionalPrice-sc-yl2rbe-0 dthYGD list-price'})
-            
-            if price_element:
-                price_str = price_element.text.strip()
-                price = float(price_str.replace('.', '').replace(',', '.').replace('R$', ''))
-                base_url = p.find('a', attrs={'aria-current':'page'})['href']
-                individual_link = "https://www.americanas.com.br" + base_url
-
-                self.all_rows.append({'title': title, 'price': price, 'link': individual_link})
-                self.products_links_queue.put(individual_link)
-
-    def get_brand(self, link, soup):
-        """Extrai a marca do produto a partir da página do link."""
-        try:
-            tag_brand = soup.find('td', text='Marca')
-            if tag_brand:
-                brand = tag_brand.find_next('td').text.strip()
-                with self.brand_lock:
-                    self.brand_dict[link] = brand
-            else:
-                brand = None
-        except Exception as e:
-            print(f"Erro ao processar a marca no link {link}: {e}")
-            brand = None
-        return self.brand_dict
-
-    def get_anatel_code(self, link, iterator):
-        """Extrai o código ANATEL do produto a partir da página."""
-        try:
-            tag_code = iterator.find_next('td', class_='spec-drawer__Text-sc-jcvy3q-5 fMwSYd')
-            code = tag_code.text.replace('-', '') if tag_code else None
-            with self.codes_lock:
-                self.codes_dict[link] = code
-        except Exception as e:
-            print(f"Erro ao processar {link}: {e}")
-        return self.codes_dict
-
-    def get_anatel_code_and_brand(self, link):
-        """Função principal para extrair código ANATEL e marca de um link."""
-        try:
-            proxy = get_random_proxy()
-            request = requests.get(link, headers=self.headers, proxies=proxy)
-            soup = BeautifulSoup(request.content, 'html.parser')
-            
-            html_tag = soup.find_all('td', class_='spec-drawer__Text-sc-jcvy3q-5 fMwSYd')
-            code = None
-            brand = None
-            
-            for tag in html_tag:
-                if any(substring in tag.get_text(strip=True) for substring in ['Código de homologação (Anatel', 'Codigo Homolog (ANATEL)']):
-                    code = self.get_anatel_code(link=link, iterator=tag)
-                
-                if 'Marca' in tag.get_text(strip=True):
-                    brand = self.get_brand(link=link, soup=soup)
+        """Extrai informações de título, preço e link de produtos da página e retorna quantos foram encontrados."""
+        rows, amount = extract_products(soup, self.base_url)
+        self.add_products(rows)
+        return amount
 
-            return code, brand
-        
-        except Exception as e:
-            print(f"Erro ao processar {link}: {e}")
-            return None, None  
+    def listing_parse_args(self):
+        return (self.base_url,)
 
     def next_page(self, soup):
         """Verifica se há uma próxima página para navegar."""
-        next_button = soup.find('a', {'class':'src__PageLink-sc-82ugau-3 exDCiw'})
-        return f'&page={self.page + 1}&limit={self.limit}&offset={self.offset}' if next_button else None
-
-    def main(self):
-        """Função principal para realizar scraping, processar links e extrair dados."""
-        while True:
-            current_url = f"{self.url}&page={self.page}&limit={self.limit}&offset={self.offset}"
-            proxy = get_random_proxy()
-            request = requests.get(current_url, headers=self.headers, proxies=proxy, verify=False)
-            time.sleep(3)
-            soup = BeautifulSoup(request.content, 'html.parser')
-
-            self.get_products(soup)
-
-            next_params = self.next_page(soup)
-            if not next_params or self.offset >= self.amount_of_products:
-                break
-
-            self.offset += self.limit
-            self.page += 1
-
-        # Usando ThreadPoolExecutor para processar os links em paralelo
-        with ThreadPoolExecutor(max_workers=self.num_threads) as executor:
-            while not self.products_links_queue.empty():
-                link = self.products_links_queue.get()
-                executor.submit(self.get_anatel_code_and_brand, link)
-
-        # Criando DataFrame e processando os resultados
-        df_americanas = pd.DataFrame(self.all_rows)
-        df_americanas['code'] = df_americanas['link'].map(self.codes_dict)
-        df_americanas['brand'] = df_americanas['link'].map(self.brand_dict)
-        
-        # Filtrando valores nulos e inválidos
-        df_americanas = df_americanas.dropna(subset=['code'])
-        df_americanas = df_americanas[df_americanas['code'] != 'Null']
-        
-        df_americanas = df_americanas.dropna(subset=['price'])
-        df_americanas = df_americanas[df_americanas['price'] > 0]
+        return f'&page={self.page + 1}&limit={self.limit}&offset={self.offset}' if has_next_page(soup) else None
 
-        return df_americanas
+    def listing_url(self):
+        return f"{self.url}&page={self.page}&limit={self.limit}&offset={self.offset}"
 
+    def listing_urls(self):
+        """Gera, sob demanda, as URLs das páginas de listagem a partir do offset atual, até 'amount_of_products' (sem limite se None)."""
+        if self.amount_of_products is None:
+            offsets = count(self.offset, self.limit)
+        else:
+            offsets = range(self.offset, self.amount_of_products + self.limit, self.limit)
+        for offset in offsets:
+            page = offset // self.limit + 1
+            yield f"{self.url}&page={page}&limit={self.limit}&offset={offset}"
+
+    def advance(self, pages=1):
+        self.offset += self.limit * pages
+        self.page = self.offset // self.limit + 1
+
+    def listing_exhausted(self):
+        return self.amount_of_products is not None and self.offset >= self.amount_of_products
+
+    def cursor_state(self):
+        return {'page': self.page, 'offset': self.offset}
+
+    def restore_cursor(self, state):
+        self.page = state['page']
+        self.offset = state['offset']
 
-    
     def americanas_mercado_livre_matching_codes(self, df_mercadoLivre, df_americanas):
         """
-        Verifica quais são os códigos anatel em comum no dataframe mercado Livre e Americanas.
-        Os códigos em comum serão adicionados a uma lista nomeada matching_codes.
+        Verifica quais são os códigos anatel em comum no dataframe mercado Livre e Americanas,
+        comparando os códigos normalizados. Para cruzar mais de dois marketplaces, use
+        utils.matching_functions.match_marketplaces.
         O dataframe americanas será sobescrito e passará a ter apenas os produtos que também existem
         no dataframe mercado livre.
         
@@ -161,14 +155,11 @@ class Americanas():
                     df_americanas (pd.dataframe): Dataframe americanas sobescrito com códigos em comum entre os dois.
         """
 
-        ml_codes = df_mercadoLivre['codigo'].astype(str).tolist()
+        from utils.matching_functions import normalize_anatel_codes
 
-        matching_codes = []
-        for k,v in self.codes_dict.items():
-            if v in ml_codes:
-                matching_codes.append(v)
+        ml_codes = set(normalize_anatel_codes(df_mercadoLivre['codigo']).dropna())
 
-        df_americanas = df_americanas[df_americanas['code'].isin(ml_codes)]
+        df_americanas = df_americanas[normalize_anatel_codes(df_americanas['code']).isin(ml_codes)]
         return df_americanas
 
 
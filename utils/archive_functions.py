@@ -0,0 +1,95 @@
+import os
+import json
+import time
+import zlib
+import threading
+
+
+def read_page(directory, entry):
+    """Lê e descomprime o HTML de uma entrada do índice."""
+    with open(os.path.join(directory, entry['segment']), 'rb') as file:
+        file.seek(entry['offset'])
+        return zlib.decompress(file.read(entry['length']))
+
+
+def parse_archived_page(function, directory, entry, *args):
+    """Lê a página do arquivo e aplica a função de parse. Feita para rodar dentro de um pool de processos."""
+    return function(read_page(directory, entry), *args)
+
+
+class PageArchive():
+    """
+    Arquivo local, somente de acréscimo, com o HTML das páginas baixadas.
+    Cada página é comprimida com zlib e acrescentada ao segmento do dia ('2024-05-01.pages');
+    o índice ('index.jsonl') guarda, por linha, a URL, o marketplace, o tipo da página
+    ('listing' ou 'product'), o horário da coleta e a posição da página no segmento.
+    """
+
+    def __init__(self, directory, compression_level=6):
+        self.directory = directory
+        self.compression_level = compression_level
+        self.index_path = os.path.join(directory, 'index.jsonl')
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def put(self, url, content, marketplace, kind):
+        """Acrescenta a página ao segmento do dia e registra a entrada no índice."""
+        fetched_at = time.time()
+        day = time.strftime('%Y-%m-%d', time.localtime(fetched_at))
+        segment = f'{day}.pages'
+        data = zlib.compress(content, self.compression_level)
+
+        with self.lock:
+            with open(os.path.join(self.directory, segment), 'ab') as file:
+                offset = file.tell()
+                file.write(data)
+
+            entry = {'url': url, 'marketplace': marketplace, 'kind': kind, 'fetched_at': fetched_at,
+                     'day': day, 'segment': segment, 'offset': offset, 'length': len(data)}
+            with open(self.index_path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(entry) + '\n')
+
+    def entries(self, marketplace=None, kind=None, day=None):
+        """
+        Lê o índice, na ordem em que as páginas foram baixadas.
+
+            Parâmetros:
+                    marketplace (str): Filtra pelo marketplace ('americanas', 'mercado_livre').
+                    kind (str): Filtra pelo tipo de página ('listing' ou 'product').
+                    day (str): Filtra pelo dia da coleta ('AAAA-MM-DD').
+
+            Retorno:
+                    entries (list): Entradas do índice.
+        """
+
+        if not os.path.exists(self.index_path):
+            return []
+
+        entries = []
+        with open(self.index_path, encoding='utf-8') as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Linha incompleta de uma execução interrompida
+                    continue
+                if marketplace is not None and entry['marketplace'] != marketplace:
+                    continue
+                if kind is not None and entry['kind'] != kind:
+                    continue
+                if day is not None and entry['day'] != day:
+                    continue
+                entries.append(entry)
+        return entries
+
+    @staticmethod
+    def latest(entries):
+        """Mantém apenas a coleta mais recente de cada URL. Retorna um dicionário url -> entrada."""
+        latest = {}
+        for entry in entries:
+            if entry['url'] not in latest or entry['fetched_at'] >= latest[entry['url']]['fetched_at']:
+                latest[entry['url']] = entry
+        return latest
+
+    def read(self, entry):
+        return read_page(self.directory, entry)
@@ -0,0 +1,151 @@
+import asyncio
+import time
+from utils.cache_functions import build_response
+from utils.http_functions import record_request
+from utils.metrics_functions import metrics
+from utils.rate_limit_functions import rate_limiter as shared_rate_limiter, is_blocked_response
+from utils.retry_functions import classify_error, raise_for_outcome, SUCCESS, FATAL, BLOCKED
+
+
+class AsyncFetcher():
+    """
+    Motor de requisições assíncronas (asyncio + aiohttp) compartilhado pelos scrapers.
+    Um semáforo limita quantas requisições ficam em andamento ao mesmo tempo e cada requisição
+    tem seu próprio timeout. O limitador de taxa, o gerenciador de proxies e o cache são os mesmos
+    usados pelo fetch síncrono, assim como a política de retentativas e as requisições "hedged".
+    """
+
+    def __init__(self, headers, concurrency=200, timeout=30, rate_limiter=None, proxy_manager=None, cache=None, retry_policy=None):
+        self.headers = headers
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.proxy_manager = proxy_manager
+        self.cache = cache
+        self.retry_policy = retry_policy
+        self.semaphore = None
+        self.session = None
+
+    async def __aenter__(self):
+        import aiohttp
+
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+
+    async def get(self, url, verify=True, use_cache=True):
+        """
+        Baixa a URL aplicando a política de retentativas: backoff exponencial com jitter,
+        um proxy diferente a cada tentativa e, opcionalmente, uma requisição "hedged".
+
+            Parâmetros:
+                    url (str): URL que será requisitada.
+                    verify (bool): Se o certificado TLS deve ser verificado.
+                    use_cache (bool): Se o cache deve ser usado (páginas de listagem não são cacheadas).
+
+            Retorno:
+                    response (requests.Response): Resposta da requisição. Lança requests.HTTPError se, ao fim
+                    das tentativas, a resposta não for classificada como SUCCESS.
+        """
+
+        policy = self.retry_policy
+        if policy is None:
+            return await self.get_once(url, verify=verify, use_cache=use_cache)
+
+        tried = []
+        for attempt in range(policy.max_attempts):
+            response, exception = None, None
+            try:
+                response = await self.hedged_get(url, verify, use_cache, tried)
+            except Exception as e:
+                exception = e
+
+            outcome = classify_error(response=response, exception=exception)
+            last_attempt = attempt == policy.max_attempts - 1
+            if outcome in (SUCCESS, FATAL) or last_attempt or not policy.budget.consume():
+                if exception is not None:
+                    raise exception
+                if outcome != SUCCESS:
+                    raise_for_outcome(response)
+                return response
+
+            await asyncio.sleep(policy.delay(attempt, blocked=outcome == BLOCKED))
+
+    async def hedged_get(self, url, verify, use_cache, tried):
+        """Dispara uma segunda requisição, por outro proxy, se a primeira passar de 'hedge_after' segundos."""
+
+        def attempt():
+            proxies = self.proxy_manager.get_proxy(exclude=tried) if self.proxy_manager is not None else None
+            if proxies is not None:
+                tried.append(proxies)
+            return asyncio.ensure_future(self.get_once(url, verify=verify, use_cache=use_cache, proxies=proxies))
+
+        first = attempt()
+        if not self.retry_policy.hedge_after:
+            return await first
+
+        done, _ = await asyncio.wait({first}, timeout=self.retry_policy.hedge_after)
+        if done:
+            return first.result()
+
+        pending = {first, attempt()}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None or not pending:
+                    for other in pending:
+                        other.cancel()
+                    return task.result()
+
+    async def get_once(self, url, verify=True, use_cache=True, proxies=None):
+        """
+        Faz uma única tentativa de baixar a URL, respeitando o limite de concorrência, e retorna
+        um requests.Response com o corpo, para que as funções de extração existentes funcionem sem mudanças.
+        """
+
+        cache = self.cache if use_cache else None
+        headers = self.headers
+        cached = cache.get(url) if cache is not None else None
+        if cached is not None:
+            meta, body = cached
+            if cache.is_fresh(meta):
+                metrics.inc('cache_requests_total', result='hit')
+                return build_response(url, body)
+            headers = {**headers, **cache.conditional_headers(meta)}
+
+        if proxies is None and self.proxy_manager is not None:
+            proxies = self.proxy_manager.get_proxy()
+        proxy = (proxies.get('https') or proxies.get('http')) if proxies else None
+
+        async with self.semaphore:
+            await self.rate_limiter.acquire_async(url)
+            start = time.monotonic()
+            try:
+                async with self.session.get(url, headers=headers, proxy=proxy, ssl=None if verify else False) as raw_response:
+                    response = build_response(url, await raw_response.read(), raw_response.status)
+                    response.headers.update(raw_response.headers)
+            except Exception:
+                record_request(url, time.monotonic() - start)
+                if self.proxy_manager is not None:
+                    self.proxy_manager.report(proxies, latency=time.monotonic() - start, error=True)
+                raise
+
+        record_request(url, time.monotonic() - start, response)
+        if self.proxy_manager is not None:
+            self.proxy_manager.report(proxies, latency=time.monotonic() - start, banned=is_blocked_response(response))
+        self.rate_limiter.feedback(url, response)
+
+        if cache is not None:
+            if response.status_code == 304 and cached is not None:
+                metrics.inc('cache_requests_total', result='revalidated')
+                cache.touch(url, meta)
+                return build_response(url, body)
+            metrics.inc('cache_requests_total', result='miss')
+            if response.status_code == 200 and not is_blocked_response(response):
+                cache.put(url, response)
+
+        return response
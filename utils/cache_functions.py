@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import requests
+from utils.frontier_functions import canonicalize_url
+
+
+def cache_key(url):
+    """Gera a chave do cache a partir da URL canônica, sem fragmento nem parâmetros de rastreamento."""
+    return hashlib.sha256(canonicalize_url(url).encode('utf-8')).hexdigest()
+
+
+def build_response(url, body, status_code=200):
+    """Monta um requests.Response a partir de um corpo armazenado no cache."""
+    response = requests.Response()
+    response._content = body
+    response.status_code = status_code
+    response.url = url
+    return response
+
+
+class HttpCache():
+    """
+    Cache de respostas HTTP em disco, indexado pela URL canônica.
+    Dentro do 'ttl' a resposta é reutilizada sem acessar a rede. Depois disso, a página é revalidada
+    com If-None-Match/If-Modified-Since e um 304 reaproveita o corpo armazenado.
+    Quando o cache passa de 'max_bytes', as entradas menos usadas recentemente são removidas.
+    """
+
+    def __init__(self, directory, ttl=7 * 24 * 3600, max_bytes=500 * 1024 * 1024):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.total_bytes = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+    def paths(self, url):
+        key = cache_key(url)
+        return os.path.join(self.directory, f'{key}.json'), os.path.join(self.directory, f'{key}.body')
+
+    def get(self, url):
+        """Retorna os metadados e o corpo armazenados para a URL, ou None se não estiver no cache."""
+        meta_path, body_path = self.paths(url)
+        try:
+            with open(meta_path, 'r') as file:
+                meta = json.load(file)
+            with open(body_path, 'rb') as file:
+                body = file.read()
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        # Atualiza o horário de acesso usado na remoção das entradas antigas
+        os.utime(body_path)
+        return meta, body
+
+    def is_fresh(self, meta):
+        return time.time() - meta['stored_at'] < self.ttl
+
+    def conditional_headers(self, meta):
+        """Headers de revalidação a partir do ETag/Last-Modified armazenados."""
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def put(self, url, response):
+        """Armazena o corpo e os validadores de uma resposta 200."""
+        meta_path, body_path = self.paths(url)
+        meta = {'url': url,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'stored_at': time.time()}
+
+        with self.lock:
+            previous = os.path.getsize(body_path) if os.path.exists(body_path) else 0
+            with open(body_path, 'wb') as file:
+                file.write(response.content)
+            with open(meta_path, 'w') as file:
+                json.dump(meta, file)
+            self.total_bytes += len(response.content) - previous
+
+            if self.total_bytes > self.max_bytes:
+                self.evict()
+
+    def touch(self, url, meta):
+        """Renova a validade de uma entrada após um 304."""
+        meta_path, _ = self.paths(url)
+        meta['stored_at'] = time.time()
+        with open(meta_path, 'w') as file:
+            json.dump(meta, file)
+
+    def evict(self):
+        """Remove as entradas acessadas há mais tempo até o cache ocupar 90% de 'max_bytes'."""
+        bodies = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith('.body')]
+        bodies.sort(key=os.path.getmtime)
+
+        for body_path in bodies:
+            if self.total_bytes <= self.max_bytes * 0.9:
+                break
+            self.total_bytes -= os.path.getsize(body_path)
+            os.remove(body_path)
+            meta_path = body_path[:-len('.body')] + '.json'
+            if os.path.exists(meta_path):
+                os.remove(meta_path)
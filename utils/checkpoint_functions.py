@@ -0,0 +1,46 @@
+import json
+import os
+
+
+def save_checkpoint(path, state):
+    """
+    Grava o estado da coleta em um arquivo JSON local.
+    O arquivo é escrito em um temporário e depois renomeado, para que um checkpoint
+    interrompido no meio nunca substitua o anterior.
+
+        Parâmetros:
+                path (str): Caminho do arquivo de checkpoint.
+                state (dict): Estado da coleta (cursor de página, links pendentes e linhas extraídas).
+    """
+
+    temporary_path = f'{path}.tmp'
+    with open(temporary_path, 'w') as file:
+        json.dump(state, file)
+    os.replace(temporary_path, path)
+
+
+def load_checkpoint(path):
+    """
+    Lê o último checkpoint gravado.
+
+        Parâmetros:
+                path (str): Caminho do arquivo de checkpoint.
+
+        Retorno:
+                state (dict): Estado da coleta, ou None se não houver checkpoint.
+    """
+
+    if not path or not os.path.exists(path):
+        return None
+
+    with open(path, 'r') as file:
+        try:
+            return json.load(file)
+        except json.JSONDecodeError:
+            return None
+
+
+def remove_checkpoint(path):
+    """Apaga o checkpoint depois que a coleta termina com sucesso."""
+    if path and os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,736 @@
+import os
+import asyncio
+import logging
+import threading
+import queue
+import time
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from utils.http_functions import SessionPool
+from utils.retry_functions import fetch_with_retry, RetryPolicy
+from utils.async_functions import AsyncFetcher
+from utils.parsing_functions import code_and_brand
+from utils.proxy_functions import ProxyManager
+from utils.frontier_functions import Frontier
+from utils.rate_limit_functions import rate_limiter as shared_rate_limiter
+from utils.checkpoint_functions import save_checkpoint, load_checkpoint, remove_checkpoint
+from utils.metrics_functions import metrics, timed
+from utils.sink_functions import SCHEMA, ProductRecord, is_valid_record
+from utils.archive_functions import parse_archived_page
+
+# Sinal enviado às threads de detalhe quando a paginação termina.
+STOP_SIGNAL = None
+
+
+class Crawler():
+    """
+    Base dos scrapers dos marketplaces: fila de links, threads de detalhe, motor assíncrono, modo de parse
+    em processos, checkpoint, sink e reextração a partir do arquivo de páginas.
+
+    Cada marketplace define apenas o que é dele:
+        name, display_name (str): Label das métricas e nome usado nos logs.
+        code_labels (list): Nomes do campo do código anatel na tabela de especificações.
+        listing_parser, product_parser: Funções de módulo (para rodar em um pool de processos) que fazem
+                o parse das páginas de listagem e de produto.
+        listing_fetch_options (dict): Argumentos extras da requisição das páginas de listagem.
+        listing_parse_args(), listing_url(), listing_urls(), advance(), listing_exhausted(),
+        cursor_state() e restore_cursor(): O esquema de URLs e o cursor da paginação.
+    """
+
+    name = None
+    display_name = None
+    code_labels = []
+    listing_parser = None
+    product_parser = None
+    listing_fetch_options = {}
+
+    def __init__(self, url, headers, num_threads, queue_size=100, parallel_listing=False, listing_threads=4, rate_limiter=None, proxy_manager=None, cache=None, known_products=None, frontier=None, checkpoint_path=None, checkpoint_interval=30, parse_mode='thread', parse_processes=None, async_concurrency=200, retry_policy=None, sink=None, keep_rows=True, archive=None, amount_of_products=None):
+        self.url = url
+        self.headers = headers
+        self.num_threads = num_threads
+        # Fila limitada: a paginação espera quando as threads de detalhe ficam para trás.
+        self.products_links_queue = queue.Queue(maxsize=queue_size)
+        # Link -> (código, marca, especificações) dos produtos cujo detalhe já foi processado
+        self.details = {}
+        self.details_lock = threading.Lock()
+        # Produtos concluídos, como ProductRecord. Com keep_rows=False, eles vão apenas para o sink
+        self.all_rows = []
+        # Produtos admitidos cuja página de detalhe ainda não foi processada, por link
+        self.pending_rows = {}
+        self.rows_lock = threading.Lock()
+        self.sink = sink
+        # Posição do sink no início da coleta: com keep_rows=False, os produtos são lidos de volta a partir dela
+        self.sink_start = None
+        self.keep_rows = keep_rows
+        # Com None, a paginação segue até a última página da categoria
+        self.amount_of_products = amount_of_products
+        self.parallel_listing = parallel_listing
+        self.listing_threads = listing_threads
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.sessions = SessionPool(pool_size=num_threads + listing_threads)
+        self.proxy_manager = proxy_manager or ProxyManager.from_credentials()
+        self.cache = cache
+        # Índice link -> (código, marca) carregado do banco para a coleta incremental
+        self.known_products = known_products or {}
+        self.frontier = frontier or Frontier()
+        self.listing_done = False
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoint_lock = threading.Lock()
+        self.last_checkpoint = time.monotonic()
+        # No modo 'process', as threads só baixam as páginas e o parse roda em um pool de processos
+        self.parse_mode = parse_mode
+        self.parse_processes = parse_processes or os.cpu_count()
+        self.parse_pool = None
+        self.parsed_queue = queue.Queue(maxsize=queue_size)
+        # Máximo de requisições em andamento no motor assíncrono
+        self.async_concurrency = async_concurrency
+        self.retry_policy = retry_policy or RetryPolicy()
+        # Links que falharam mesmo depois das retentativas
+        self.failed_links = []
+        # PageArchive onde o HTML baixado é guardado para o modo reextract
+        self.archive = archive
+
+
+    def listing_parse_args(self):
+        """Argumentos extras do listing_parser, além do conteúdo da página."""
+        return ()
+
+
+    def listing_url(self):
+        """URL da página de listagem no cursor atual."""
+        raise NotImplementedError
+
+
+    def listing_urls(self):
+        """Gera, sob demanda, as URLs das páginas de listagem a partir do cursor atual, até 'amount_of_products'."""
+        raise NotImplementedError
+
+
+    def advance(self, pages=1):
+        """Avança o cursor da paginação em 'pages' páginas."""
+        raise NotImplementedError
+
+
+    def listing_exhausted(self):
+        """Indica se o cursor chegou a 'amount_of_products'. Sem limite, a paginação só para na última página."""
+        raise NotImplementedError
+
+
+    def cursor_state(self):
+        """Cursor da paginação, gravado no checkpoint."""
+        raise NotImplementedError
+
+
+    def restore_cursor(self, state):
+        """Restaura o cursor da paginação a partir do checkpoint."""
+        raise NotImplementedError
+
+
+    def admit_products(self, rows):
+        """
+        Admite na fronteira os produtos ainda não vistos e os guarda como pendentes até o detalhe ser processado.
+
+            Parâmetros:
+                    rows (list): Linhas extraídas da página de listagem.
+
+            Retorno:
+                    links (list): Links canônicos dos produtos admitidos.
+        """
+
+        links = []
+        for row in rows:
+            individual_link = self.frontier.admit(row['link'])
+            if individual_link is not None:
+                with self.rows_lock:
+                    self.pending_rows[individual_link] = ProductRecord(self.name, row['title'], row['price'], individual_link)
+                links.append(individual_link)
+        return links
+
+
+    def add_products(self, rows):
+        """
+        Admite na fronteira os produtos ainda não vistos, salva suas linhas e coloca seus links na fila.
+
+            Parâmetros:
+                    rows (list): Linhas extraídas da página de listagem.
+        """
+
+        for individual_link in self.admit_products(rows):
+            self.products_links_queue.put(individual_link)
+        metrics.set_gauge('queue_depth', self.products_links_queue.qsize(), marketplace=self.name, queue='product_links')
+
+
+    def store_product(self, link, specs):
+        """
+        Grava, em uma única escrita, as especificações do link junto com o código anatel e a marca
+        obtidos delas, e conta nas métricas quais campos foram encontrados.
+
+            Parâmetros:
+                    link (str): Link do produto.
+                    specs (dict): Especificações extraídas da página do produto.
+
+            Retorno:
+                    Tupla (código anatel, marca).
+        """
+
+        code, brand = code_and_brand(specs, self.code_labels)
+        for field, value in (('code', code), ('brand', brand)):
+            metrics.inc('extraction_total', marketplace=self.name, field=field, result='miss' if value is None else 'hit')
+
+        with self.details_lock:
+            self.details[link] = (code, brand, specs)
+        return code, brand
+
+
+    def finish_product(self, link):
+        """
+        Completa o registro pendente do link com o código anatel, a marca e as especificações. O registro
+        vai para 'all_rows' (se 'keep_rows') e, se for válido, para o sink; o detalhe do link sai de 'details'
+        para que a memória não cresça com a quantidade de produtos.
+
+            Parâmetros:
+                    link (str): Link do produto.
+        """
+
+        with self.rows_lock:
+            row = self.pending_rows.pop(link, None)
+        if row is None:
+            return
+
+        with self.details_lock:
+            code, brand, specs = self.details.pop(link, (None, None, None))
+
+        record = row._replace(code=code, brand=brand, specs=specs)
+        # Sob o mesmo lock do checkpoint: o registro sai de 'pending_rows' e entra no sink de uma vez
+        with self.rows_lock:
+            if self.keep_rows:
+                self.all_rows.append(record)
+            if self.sink is not None and is_valid_record(record):
+                self.sink.write(record)
+
+
+    def archive_page(self, url, response, kind):
+        """
+        Guarda o HTML da página no arquivo de páginas, se ele foi configurado.
+
+            Parâmetros:
+                    url (str): URL da página.
+                    response (requests.Response): Resposta da requisição.
+                    kind (str): Tipo da página: 'listing' ou 'product'.
+        """
+
+        if self.archive is not None and response.status_code == 200:
+            self.archive.put(url, response.content, marketplace=self.name, kind=kind)
+
+
+    def get_anatel_code_and_brand(self, link):
+        """
+        Baixa a página de um produto e extrai o código anatel e a marca. Em caso de erro, o link
+        vai para 'failed_links' e o produto é concluído sem código.
+
+            Parâmetros:
+                    link (str): Link do produto.
+
+            Retorno:
+                    Tupla (código anatel, marca). No modo 'process', (None, None): o resultado é gravado pela thread coletora.
+        """
+
+        try:
+            with metrics.timer('stage_seconds', marketplace=self.name, stage='detail_fetch'):
+                request = fetch_with_retry(link, self.headers, self.retry_policy, proxy_manager=self.proxy_manager, rate_limiter=self.rate_limiter, sessions=self.sessions, cache=self.cache)
+            self.archive_page(link, request, 'product')
+
+            # No modo 'process', o parse vai para o pool de processos e é gravado pela thread coletora
+            if self.parse_pool is not None:
+                self.parsed_queue.put((link, self.parse_pool.submit(timed, self.product_parser, request.content)))
+                metrics.set_gauge('queue_depth', self.parsed_queue.qsize(), marketplace=self.name, queue='parsed')
+                return None, None
+
+            with metrics.timer('stage_seconds', marketplace=self.name, stage='detail_parse'):
+                specs = self.product_parser(request.content)
+            code, brand = self.store_product(link, specs)
+            self.finish_product(link)
+            return code, brand
+
+        except Exception as e:
+            logging.warning(f'Erro ao processar {link}: {e}')
+            metrics.inc('errors_total', marketplace=self.name, stage='detail')
+            self.failed_links.append(link)
+            self.finish_product(link)
+            return None, None
+
+
+    def collect_parsed_products(self):
+        """
+        Thread coletora do modo 'process': grava os resultados do pool de processos
+        até receber o sinal de parada.
+        """
+
+        while True:
+            item = self.parsed_queue.get()
+            if item is STOP_SIGNAL:
+                break
+
+            link, future = item
+            try:
+                specs, seconds = future.result()
+                metrics.observe('stage_seconds', seconds, marketplace=self.name, stage='detail_parse')
+                self.store_product(link, specs)
+            except Exception as e:
+                logging.warning(f'Erro ao processar {link}: {e}')
+                metrics.inc('errors_total', marketplace=self.name, stage='detail_parse')
+            self.finish_product(link)
+
+
+    def process_listing_page(self, url):
+        """
+        Baixa uma página de listagem e extrai os produtos existentes nela.
+
+            Parâmetros:
+                    url (str): URL da página de listagem.
+
+            Retorno:
+                    Quantidade de produtos encontrados e se existe uma próxima página.
+        """
+
+        logging.debug(f'current_url = {url}')
+        with metrics.timer('stage_seconds', marketplace=self.name, stage='listing_fetch'):
+            request = fetch_with_retry(url, self.headers, self.retry_policy, proxy_manager=self.proxy_manager, rate_limiter=self.rate_limiter, sessions=self.sessions, **self.listing_fetch_options)
+        self.archive_page(url, request, 'listing')
+
+        if self.parse_pool is not None:
+            (rows, amount, has_next), seconds = self.parse_pool.submit(timed, self.listing_parser, request.content, *self.listing_parse_args()).result()
+        else:
+            (rows, amount, has_next), seconds = timed(self.listing_parser, request.content, *self.listing_parse_args())
+        metrics.observe('stage_seconds', seconds, marketplace=self.name, stage='listing_parse')
+
+        self.add_products(rows)
+        return amount, has_next
+
+
+    def crawl_listing_pages(self):
+        """
+        Percorre as páginas de listagem uma a uma, seguindo o botão de próxima página.
+        """
+
+        while True:
+            _, has_next = self.process_listing_page(self.listing_url())
+
+            if not has_next or self.listing_exhausted():
+                break
+
+            self.advance()
+            self.save_checkpoint()
+
+
+    def crawl_listing_pages_parallel(self):
+        """
+        Baixa as páginas de listagem em paralelo, em lotes de até 'listing_threads' páginas.
+        As URLs são geradas sob demanda por listing_urls e a coleta para na primeira página vazia.
+        """
+
+        urls = self.listing_urls()
+        with ThreadPoolExecutor(max_workers=self.listing_threads) as executor:
+            for batch in iter(lambda: list(islice(urls, self.listing_threads)), []):
+                amounts = [amount for amount, _ in executor.map(self.process_listing_page, batch)]
+                if 0 in amounts:
+                    break
+
+                self.advance(len(batch))
+                self.save_checkpoint()
+
+
+    def checkpoint_state(self):
+        """
+        Monta o estado atual da coleta para o checkpoint.
+
+            Retorno:
+                    state (dict): Cursor da paginação, produtos concluídos e pendentes (gravados
+                    no JSON como listas), o detalhe dos produtos ainda não concluídos e a posição do sink.
+        """
+
+        # O sink é descarregado junto com a cópia do estado: tudo o que saiu de 'pending_rows' já está nele
+        with self.rows_lock, self.details_lock:
+            rows = list(self.all_rows)
+            pending_rows = list(self.pending_rows.values())
+            details = dict(self.details)
+            sink_position = self.sink.flush() if self.sink is not None else None
+
+        return {**self.cursor_state(),
+                'listing_done': self.listing_done,
+                'all_rows': rows,
+                'pending_rows': pending_rows,
+                'details': details,
+                'sink_start': self.sink_start,
+                'sink_position': sink_position}
+
+
+    def save_checkpoint(self, force=False):
+        """
+        Grava o checkpoint da coleta, no máximo uma vez a cada 'checkpoint_interval' segundos.
+
+            Parâmetros:
+                    force (bool): Grava mesmo que o intervalo ainda não tenha passado.
+        """
+
+        if not self.checkpoint_path:
+            return
+
+        with self.checkpoint_lock:
+            if not force and time.monotonic() - self.last_checkpoint < self.checkpoint_interval:
+                return
+            save_checkpoint(self.checkpoint_path, self.checkpoint_state())
+            self.last_checkpoint = time.monotonic()
+
+
+    def resume(self):
+        """
+        Restaura o estado do último checkpoint gravado em 'checkpoint_path'.
+
+            Retorno:
+                    pending_links (list): Links que ainda precisam ter o detalhe processado.
+        """
+
+        state = load_checkpoint(self.checkpoint_path)
+        if state is None:
+            return []
+
+        self.restore_cursor(state)
+        self.listing_done = state['listing_done']
+        self.all_rows = [ProductRecord(*row) for row in state['all_rows']]
+        self.pending_rows = {row.link: row for row in (ProductRecord(*row) for row in state['pending_rows'])}
+        self.details = {link: tuple(detail) for link, detail in state['details'].items()}
+        # O que foi gravado no sink depois do checkpoint volta como pendente: é descartado para não duplicar
+        if self.sink is not None and state.get('sink_position') is not None:
+            self.sink.rollback(state['sink_position'])
+            self.sink_start = state['sink_start']
+        self.frontier.seen.update(row.link for row in self.all_rows)
+        self.frontier.seen.update(self.pending_rows)
+        return list(self.pending_rows)
+
+
+    def resolve_known_link(self, link):
+        """
+        Preenche o código anatel e a marca do link a partir do índice carregado do banco,
+        evitando abrir a página do produto novamente.
+
+            Parâmetros:
+                    link (str): Link do produto.
+
+            Retorno:
+                    True se o link já era conhecido, False se a página ainda precisa ser buscada.
+        """
+
+        known = self.known_products.get(link.lower())
+        if known is None:
+            return False
+
+        code, brand = known
+        with self.details_lock:
+            self.details[link] = (code, brand, None)
+        return True
+
+
+    def consume_links(self):
+        """
+        Consome os links da fila de produtos até receber o sinal de parada (STOP_SIGNAL).
+        Cada thread de detalhe executa esta função enquanto a paginação ainda está em andamento.
+        Um erro inesperado (no checkpoint, por exemplo) é registrado e a thread segue consumindo:
+        se todas as threads morressem, a paginação ficaria bloqueada para sempre na fila cheia.
+        """
+
+        while True:
+            link = self.products_links_queue.get()
+            metrics.set_gauge('queue_depth', self.products_links_queue.qsize(), marketplace=self.name, queue='product_links')
+            try:
+                if link is STOP_SIGNAL:
+                    break
+                if self.resolve_known_link(link):
+                    self.finish_product(link)
+                else:
+                    self.get_anatel_code_and_brand(link)
+                self.save_checkpoint()
+            except Exception as e:
+                logging.error(f'Erro inesperado na thread de detalhe ao processar {link}: {e}')
+                metrics.inc('errors_total', marketplace=self.name, stage='detail_worker')
+                if link in self.pending_rows:
+                    self.failed_links.append(link)
+                    self.finish_product(link)
+            finally:
+                self.products_links_queue.task_done()
+
+
+    def crawl_threads(self, pending_links):
+        """
+        Executa a coleta com threads: a paginação roda na thread principal e as páginas de produto
+        nas threads de detalhe, que consomem os links à medida que as páginas de listagem são processadas.
+
+            Parâmetros:
+                    pending_links (list): Links restaurados do checkpoint que ainda precisam ser processados.
+        """
+
+        collector = None
+        if self.parse_mode == 'process':
+            self.parse_pool = ProcessPoolExecutor(max_workers=self.parse_processes)
+            # Inicia os processos antes das threads de rede
+            self.parse_pool.submit(int).result()
+            collector = threading.Thread(target=self.collect_parsed_products)
+            collector.start()
+
+        with ThreadPoolExecutor(max_workers=self.num_threads) as executor:
+            workers = [executor.submit(self.consume_links) for _ in range(self.num_threads)]
+
+            try:
+                for link in pending_links:
+                    self.products_links_queue.put(link)
+
+                if not self.listing_done:
+                    if self.parallel_listing:
+                        self.crawl_listing_pages_parallel()
+                    else:
+                        self.crawl_listing_pages()
+                    self.listing_done = True
+            finally:
+                # O sinal de parada é enviado mesmo se o último checkpoint falhar, para não travar as threads de detalhe
+                try:
+                    self.save_checkpoint(force=True)
+                finally:
+                    for _ in range(self.num_threads):
+                        self.products_links_queue.put(STOP_SIGNAL)
+
+        # Propaga o erro de uma thread de detalhe que tenha terminado por exceção
+        for worker in workers:
+            worker.result()
+
+        if collector is not None:
+            self.parsed_queue.put(STOP_SIGNAL)
+            collector.join()
+            self.parse_pool.shutdown()
+            self.parse_pool = None
+
+        self.sessions.close()
+
+
+    async def fetch_product_async(self, fetcher, link):
+        """
+        Baixa a página de um produto pelo motor assíncrono e grava o código anatel e a marca.
+
+            Parâmetros:
+                    fetcher (AsyncFetcher): Motor de requisições assíncronas.
+                    link (str): Link do produto.
+        """
+
+        try:
+            if not self.resolve_known_link(link):
+                with metrics.timer('stage_seconds', marketplace=self.name, stage='detail_fetch'):
+                    response = await fetcher.get(link)
+                self.archive_page(link, response, 'product')
+                with metrics.timer('stage_seconds', marketplace=self.name, stage='detail_parse'):
+                    specs = self.product_parser(response.content)
+                self.store_product(link, specs)
+        except Exception as e:
+            logging.warning(f'Erro ao processar {link}: {e}')
+            metrics.inc('errors_total', marketplace=self.name, stage='detail')
+            self.failed_links.append(link)
+
+        self.finish_product(link)
+        self.save_checkpoint()
+
+
+    async def fetch_listing_async(self, fetcher, url):
+        """
+        Baixa uma página de listagem pelo motor assíncrono, medindo o tempo da etapa.
+
+            Parâmetros:
+                    fetcher (AsyncFetcher): Motor de requisições assíncronas.
+                    url (str): URL da página de listagem.
+
+            Retorno:
+                    response (requests.Response): Resposta da requisição.
+        """
+
+        logging.debug(f'current_url = {url}')
+        with metrics.timer('stage_seconds', marketplace=self.name, stage='listing_fetch'):
+            response = await fetcher.get(url, use_cache=False, **self.listing_fetch_options)
+        self.archive_page(url, response, 'listing')
+        return response
+
+
+    async def crawl_async(self, pending_links):
+        """
+        Executa a coleta com asyncio. As páginas de listagem são baixadas em lotes de 'listing_threads'
+        e cada produto novo vira uma tarefa; o semáforo do AsyncFetcher limita as requisições em andamento.
+
+            Parâmetros:
+                    pending_links (list): Links restaurados do checkpoint que ainda precisam ser processados.
+        """
+
+        async with AsyncFetcher(headers=self.headers, concurrency=self.async_concurrency, rate_limiter=self.rate_limiter,
+                                proxy_manager=self.proxy_manager, cache=self.cache, retry_policy=self.retry_policy) as fetcher:
+            tasks = [asyncio.create_task(self.fetch_product_async(fetcher, link)) for link in pending_links]
+
+            try:
+                listing_error = None
+                urls = iter([]) if self.listing_done else self.listing_urls()
+                for batch in iter(lambda: list(islice(urls, self.listing_threads)), []):
+                    responses = await asyncio.gather(*(self.fetch_listing_async(fetcher, url) for url in batch), return_exceptions=True)
+
+                    amounts = []
+                    for url, response in zip(batch, responses):
+                        if isinstance(response, Exception):
+                            logging.warning(f'Erro ao processar {url}: {response}')
+                            metrics.inc('errors_total', marketplace=self.name, stage='listing')
+                            listing_error = listing_error or response
+                            continue
+
+                        with metrics.timer('stage_seconds', marketplace=self.name, stage='listing_parse'):
+                            rows, amount, _ = self.listing_parser(response.content, *self.listing_parse_args())
+                        amounts.append(amount)
+                        for link in self.admit_products(rows):
+                            tasks.append(asyncio.create_task(self.fetch_product_async(fetcher, link)))
+                    metrics.set_gauge('queue_depth', sum(not task.done() for task in tasks), marketplace=self.name, queue='async_tasks')
+
+                    # Como no motor de threads, uma página de listagem que falhou interrompe a coleta sem avançar
+                    # o cursor: os produtos já admitidos são concluídos e o checkpoint retoma a partir desse lote
+                    if listing_error is not None or 0 in amounts:
+                        break
+
+                    self.advance(len(batch))
+                    self.save_checkpoint()
+
+                self.listing_done = listing_error is None
+                await asyncio.gather(*tasks)
+                if listing_error is not None:
+                    raise listing_error
+            finally:
+                self.save_checkpoint(force=True)
+
+
+    def main(self, resume=False, engine='threads'):
+        """
+        Função principal, responsável por chamar e conectar todas as outras funções.
+
+            Parâmetros:
+                    resume (bool): Continua a coleta a partir do último checkpoint.
+                    engine (str): Motor de coleta: 'threads' ou 'async'.
+
+            Retorno:
+                    df (pd.Dataframe): Dataframe com as informações de cada produto. Com keep_rows=False
+                    ele fica vazio e os produtos estão apenas no sink (veja read_results).
+        """
+
+        pending_links = self.resume() if resume else []
+        self.start_sink()
+
+        if engine == 'async':
+            asyncio.run(self.crawl_async(pending_links))
+        else:
+            self.crawl_threads(pending_links)
+
+        self.frontier.save()
+        if self.sink is not None:
+            self.sink.close()
+        remove_checkpoint(self.checkpoint_path)
+
+        return self.build_dataframe()
+
+
+    def start_sink(self):
+        """Marca a posição do sink no início da coleta (uma coleta retomada mantém a do checkpoint)."""
+        if self.sink is not None and self.sink_start is None:
+            self.sink_start = self.sink.flush()
+
+
+    def read_results(self, chunksize=50000):
+        """
+        Lê de volta do sink, em partes, os produtos gravados nesta coleta. Com keep_rows=False é o que
+        substitui o dataframe de main(): a carga no banco é feita parte a parte, sem juntar tudo em memória.
+
+            Parâmetros:
+                    chunksize (int): Quantidade máxima de linhas por parte (no Parquet, cada arquivo é uma parte).
+
+            Retorno:
+                    frames (generator): Dataframes com as colunas do esquema compartilhado (SCHEMA).
+        """
+
+        return self.sink.read(self.sink_start or 0, chunksize)
+
+
+    def reextract(self, archive, day=None):
+        """
+        Refaz a extração a partir das páginas guardadas no arquivo, sem nenhuma requisição.
+        As páginas de listagem e de produto são lidas e processadas em um pool de processos,
+        usando os extratores atuais; assim, um seletor quebrado pode ser corrigido e a coleta
+        reprocessada sem baixar os sites de novo.
+
+            Parâmetros:
+                    archive (PageArchive): Arquivo com as páginas baixadas.
+                    day (str): Reprocessa apenas as páginas baixadas nesse dia ('AAAA-MM-DD'). As listagens são lidas
+                    da mais recente para a mais antiga, então um produto que aparece em várias coletas fica com o
+                    título e o preço da última.
+
+            Retorno:
+                    df (pd.Dataframe): O mesmo dataframe retornado por main().
+        """
+
+        # Fronteira nova: a persistida já contém os links da coleta original
+        self.frontier = Frontier()
+        self.start_sink()
+        # A primeira listagem que admite um link define o seu preço: as mais recentes vêm primeiro
+        listing_entries = sorted(archive.entries(marketplace=self.name, kind='listing', day=day),
+                                 key=lambda entry: entry['fetched_at'], reverse=True)
+        product_entries = archive.latest(archive.entries(marketplace=self.name, kind='product', day=day))
+
+        with ProcessPoolExecutor(max_workers=self.parse_processes) as pool:
+            futures = [pool.submit(parse_archived_page, self.listing_parser, archive.directory, entry, *self.listing_parse_args()) for entry in listing_entries]
+            for entry, future in zip(listing_entries, futures):
+                try:
+                    rows, _, _ = future.result()
+                    self.admit_products(rows)
+                except Exception as e:
+                    logging.warning(f"Erro ao processar {entry['url']}: {e}")
+
+            links = list(self.pending_rows)
+            archived_links = [link for link in links if link in product_entries]
+            futures = [pool.submit(parse_archived_page, self.product_parser, archive.directory, product_entries[link]) for link in archived_links]
+            for link, future in zip(archived_links, futures):
+                try:
+                    self.store_product(link, future.result())
+                except Exception as e:
+                    logging.warning(f'Erro ao processar {link}: {e}')
+                self.finish_product(link)
+
+        # Produtos sem página no arquivo ainda podem vir do índice do banco
+        for link in links:
+            if link in self.pending_rows:
+                self.resolve_known_link(link)
+                self.finish_product(link)
+
+        if self.sink is not None:
+            self.sink.close()
+        return self.build_dataframe()
+
+
+    def build_dataframe(self):
+        """
+        Monta o dataframe final com os produtos concluídos, descartando os que não têm código anatel ou preço.
+
+            Retorno:
+                    df (pd.Dataframe): Dataframe com as informações de cada produto.
+        """
+
+        # O pandas só é importado aqui, na montagem do resultado, para não pesar no import do módulo
+        import pandas as pd
+
+        df = pd.DataFrame(self.all_rows, columns=SCHEMA)
+
+        df = df.dropna(subset=['code'])
+        df = df[df['code'] != 'Null']
+
+        df = df.dropna(subset=['price'])
+        df = df[df['price'] > 0]
+
+        metrics.inc('rows_total', len(df), marketplace=self.name)
+        logging.info(f'{len(df)} produtos coletados em {self.display_name}, {len(self.failed_links)} links com erro')
+        return df
@@ -1,45 +1,237 @@
 import sys
 import os
 import psycopg2
+from psycopg2.extras import execute_values
 import pandas as pd
 import json
 import os
 import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from psycopg2.pool import ThreadedConnectionPool
 from dotenv import load_dotenv
 from utils.json_functions import load_json_file
+from utils.metrics_functions import metrics
 
 
-def connect_database():
+@lru_cache(maxsize=1)
+def load_database_config():
     """
-    Função utilizada para estabelecer uma conexão com o banco de dados PostgreSQL.
+    Carrega uma única vez as credenciais do banco de dados a partir do arquivo indicado em 'credentials_path'.
 
         Retorno:
-            Objeto para conexão com o banco.
+            connection_data (dict): Dicionário com host, database, user e password.
     """
-            
-    
+
     load_dotenv()
     connection_credentials = load_json_file(os.getenv('credentials_path'))
 
     if connection_credentials is None:
         logging.error('Credenciais não encontradas!')
-    
+
     connection_data = connection_credentials[0]
+    return {key: connection_data[key] for key in ('host', 'database', 'user', 'password')}
+
+
+def connect_database():
+    """
+    Função utilizada para estabelecer uma conexão com o banco de dados PostgreSQL.
+
+        Retorno:
+            Objeto para conexão com o banco.
+    """
 
     try:
-        connection = psycopg2.connect(
-            host=connection_data['host'],
-            database=connection_data['database'],
-            user=connection_data['user'],
-            password=connection_data['password']
-        )
+        connection = psycopg2.connect(**load_database_config())
         
     except Exception as e:
         logging.error('Conexão mal sucedida!')
+        raise
     
     return connection
 
 
+_connection_pool = None
+_connection_pool_lock = threading.Lock()
+
+
+def get_connection_pool(minconn=1, maxconn=10):
+    """
+    Retorna o pool de conexões do processo, criando-o na primeira chamada.
+
+        Parâmetros:
+            minconn (int): Quantidade mínima de conexões mantidas abertas.
+            maxconn (int): Quantidade máxima de conexões simultâneas.
+
+        Retorno:
+            Objeto ThreadedConnectionPool compartilhado por leitores e escritores.
+    """
+
+    global _connection_pool
+    with _connection_pool_lock:
+        if _connection_pool is None or _connection_pool.closed:
+            _connection_pool = ThreadedConnectionPool(minconn, maxconn, **load_database_config())
+        return _connection_pool
+
+
+def is_connection_alive(connection):
+    """Verifica se a conexão ainda responde, para descartar conexões derrubadas pelo servidor."""
+    if connection.closed:
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        connection.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+@contextmanager
+def database_connection(retries=2):
+    """
+    Empresta uma conexão do pool durante o bloco 'with' e a devolve ao final.
+    Conexões derrubadas são descartadas e substituídas por novas, e a transação
+    é desfeita se o bloco terminar com erro.
+
+        Parâmetros:
+            retries (int): Quantas vezes tentar obter uma conexão válida.
+
+        Retorno:
+            Objeto para conexão com o banco.
+    """
+
+    pool = get_connection_pool()
+    connection = pool.getconn()
+    for _ in range(retries):
+        if is_connection_alive(connection):
+            break
+        pool.putconn(connection, close=True)
+        connection = pool.getconn()
+
+    try:
+        yield connection
+    except Exception:
+        if not connection.closed:
+            connection.rollback()
+        raise
+    finally:
+        pool.putconn(connection, close=bool(connection.closed))
+
+
+
+def prepare_records(df):
+    """
+    Converte o dataframe nas tuplas (codigo, nome, marca, valor, link) que serão inseridas no banco.
+    Os textos são convertidos para minúsculas de uma só vez, sem percorrer as linhas.
+
+        Parâmetros:
+                df (pd.Dataframe): Dataframe com as colunas code, title, brand, price e link.
+        Retorno:
+                records (list): Lista de tuplas prontas para inserção.
+    """
+
+    df = df[['code', 'title', 'brand', 'price', 'link']].copy()
+    for column in ['code', 'title', 'brand', 'link']:
+        # Com pandas >= 3, os textos usam StringDtype em vez de object
+        if pd.api.types.is_string_dtype(df[column]) or pd.api.types.is_object_dtype(df[column]):
+            lowered = df[column].str.lower()
+            df[column] = lowered.where(lowered.notna(), df[column])
+
+    df = df.astype(object).where(df.notna(), None)
+    return list(df.itertuples(index=False, name=None))
+
+
+def insert_dataframe(connection, table, df, page_size=500, commit=True):
+    """
+    Insere o dataframe na tabela em lotes de várias linhas (INSERT ... VALUES multi-linha), em uma única transação.
+    Cada lote roda dentro de um savepoint: se o lote falhar, suas linhas são reinseridas uma a uma
+    e apenas as linhas inválidas são descartadas e reportadas, sem abortar o restante da carga.
+
+        Parâmetros:
+                connection: Objeto para manipular a conexão com o banco de dados.
+                table (str): Nome da tabela ('americanas' ou 'mercadoLivre').
+                df (pd.Dataframe): Dataframe que será inserido no banco de dados.
+                page_size (int): Quantidade de linhas por lote.
+                commit (bool): Com False, a transação fica aberta para quem chamou gravar outras tabelas junto.
+        Retorno:
+                failed_rows (list): Lista de tuplas (índice, erro) das linhas que não puderam ser inseridas.
+    """
+
+    if table not in ('americanas', 'mercadoLivre'):
+        raise ValueError(f'Tabela desconhecida: {table}')
+
+    command = f"""INSERT INTO {table} (codigo, nome, marca, valor, link) VALUES %s"""
+    row_command = f"""INSERT INTO {table} (codigo, nome, marca, valor, link) VALUES (%s, %s, %s, %s, %s)"""
+
+    records = prepare_records(df)
+    indexes = list(df.index)
+    failed_rows = []
+    cursor = connection.cursor()
+    start = time.perf_counter()
+
+    try:
+        for offset in range(0, len(records), page_size):
+            batch = records[offset:offset + page_size]
+            cursor.execute('SAVEPOINT batch')
+            try:
+                execute_values(cursor, command, batch, page_size=page_size)
+                cursor.execute('RELEASE SAVEPOINT batch')
+                continue
+            except Exception:
+                cursor.execute('ROLLBACK TO SAVEPOINT batch')
+
+            for index, record in zip(indexes[offset:offset + page_size], batch):
+                cursor.execute('SAVEPOINT row')
+                try:
+                    cursor.execute(row_command, record)
+                    cursor.execute('RELEASE SAVEPOINT row')
+                except Exception as e:
+                    cursor.execute('ROLLBACK TO SAVEPOINT row')
+                    failed_rows.append((index, str(e)))
+                    logging.error(f'Erro ao inserir a linha {index}: {e}')
+
+        if commit:
+            connection.commit()
+
+    except Exception as e:
+        connection.rollback()
+        logging.error(f'Erro ao inserir os dados na tabela {table}: {e}')
+        raise
+
+    metrics.observe('db_write_seconds', time.perf_counter() - start, table=table)
+    metrics.inc('db_rows_total', len(records) - len(failed_rows), table=table, result='ok')
+    metrics.inc('db_rows_total', len(failed_rows), table=table, result='failed')
+    logging.info(f'{len(records) - len(failed_rows)} linhas inseridas na tabela {table}, {len(failed_rows)} com erro')
+    return failed_rows
+
+
+
+def insert_dataframes(connection, table, frames):
+    """
+    Insere, em uma única transação, uma sequência de dataframes, como as partes lidas do sink por
+    Crawler.read_results na coleta com keep_rows=False, sem juntar todas as linhas em memória.
+
+        Parâmetros:
+                connection: Objeto para manipular a conexão com o banco de dados.
+                table (str): Nome da tabela ('americanas' ou 'mercadoLivre').
+                frames (iterable): Dataframes que serão inseridos, um de cada vez.
+        Retorno:
+                failed_rows (list): Lista de tuplas (índice, erro) das linhas que não puderam ser inseridas.
+    """
+
+    failed_rows = []
+    try:
+        for df in frames:
+            failed_rows.extend(insert_dataframe(connection=connection, table=table, df=df, commit=False))
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    return failed_rows
+
 
 def insert_into_americanas_database(connection, df_americanas):
         """
@@ -50,42 +242,113 @@ def insert_into_americanas_database(connection, df_americanas):
                 df_americanas (pd.Dataframe): Dataframe que será inserido no banco de dados.
         """
 
-        def to_lower(value):
-            return value.lower() if isinstance(value, str) else value
+        insert_dataframe(connection=connection, table='americanas', df=df_americanas)
 
 
-        cursor = connection.cursor()
 
-        for index, row in df_americanas.iterrows():
-            try: 
-                command = f"""INSERT INTO americanas (codigo, nome, marca, valor, link)
-                VALUES (%s, %s, %s, %s, %s)"""
-                cursor.execute(command, (to_lower(row['code']), to_lower(row['title']), to_lower(row['brand']), row['price'], to_lower(row['link'])))
-                connection.commit()
+def get_mercado_livre_codes_from_database(connection):
+    """
+    Lê os códigos anatel distintos da tabela do mercado livre e salva os dados em um dataframe pandas.
+    Apenas a coluna 'codigo' é trazida do banco.
+        Parâmetros:
+                connection: Objeto para manipular a conexão com o banco de dados.
+        Retorno:
+                df_mercadoLivre (pd.Dataframe): Dataframe com os códigos extraídos do banco de dados.
+    """
 
-                print(f'Inserção da linha {index} bem sucedida')
+    query = """select distinct codigo from mercadoLivre where codigo is not null"""
+    df_mercadoLivre = pd.read_sql(query, connection)
 
-            except Exception as e:
-                print(f'Erro ao inserir a linha {index}: {e}')
+    return df_mercadoLivre
 
-        connection.close()
 
+def create_matching_indexes(connection):
+    """
+    Cria os índices na coluna 'codigo' das duas tabelas e a view 'matching_products',
+    que junta os produtos da americanas e do mercado livre pelo código anatel.
+    As tabelas recebem uma linha por produto a cada coleta, então a view usa apenas a linha
+    mais recente de cada link (coluna 'coletado_em', criada aqui se ainda não existir);
+    sem isso, cada código apareceria coletas × coletas vezes.
+        Parâmetros:
+                connection: Objeto para manipular a conexão com o banco de dados.
+    """
 
+    commands = ["""alter table americanas add column if not exists coletado_em timestamp default now()""",
+                """alter table mercadoLivre add column if not exists coletado_em timestamp default now()""",
+                """create index if not exists americanas_codigo_idx on americanas (codigo)""",
+                """create index if not exists mercadolivre_codigo_idx on mercadoLivre (codigo)""",
+                """create index if not exists americanas_link_coletado_em_idx on americanas (link, coletado_em desc)""",
+                """create index if not exists mercadolivre_link_coletado_em_idx on mercadoLivre (link, coletado_em desc)""",
+                """create or replace view matching_products as
+                with latest_americanas as (
+                    select distinct on (link) codigo, nome, marca, valor, link
+                    from americanas
+                    where codigo is not null
+                    order by link, coletado_em desc),
+                latest_mercado_livre as (
+                    select distinct on (link) codigo, valor, link
+                    from mercadoLivre
+                    where codigo is not null
+                    order by link, coletado_em desc)
+                select a.codigo, a.nome, a.marca,
+                       a.valor as valor_americanas, a.link as link_americanas,
+                       m.valor as valor_mercado_livre, m.link as link_mercado_livre
+                from latest_americanas a
+                join latest_mercado_livre m on m.codigo = a.codigo"""]
 
-def get_mercado_livre_codes_from_database(connection):
+    cursor = connection.cursor()
+    for command in commands:
+        cursor.execute(command)
+    connection.commit()
+
+
+def get_matching_products(connection):
     """
-    Lê a tabela do mercado livre criada no banco de dados e salva os dados em um dataframe pandas.
+    Lê da view 'matching_products' os produtos que existem nas duas lojas, com o preço de cada uma.
         Parâmetros:
                 connection: Objeto para manipular a conexão com o banco de dados.
         Retorno:
-                df_mercadoLivre (pd.Dataframe): Dataframe com os dados extraídos do banco de dados.
+                df_matching (pd.Dataframe): Dataframe com código, nome, marca, preços e links das duas lojas.
     """
 
-    query = """select * from mercadoLivre"""
-    df_mercadoLivre = pd.read_sql(query, connection)
-    connection.close()
+    query = """select codigo, nome, marca, valor_americanas, link_americanas, valor_mercado_livre, link_mercado_livre
+    from matching_products"""
+    df_matching = pd.read_sql(query, connection)
 
-    return df_mercadoLivre
+    return df_matching
+
+
+def get_resolved_links(connection, table):
+    """
+    Lê da tabela os links que já possuem código anatel e marca, para que a próxima coleta
+    não precise abrir novamente a página desses produtos.
+
+        Parâmetros:
+                connection: Objeto para manipular a conexão com o banco de dados.
+                table (str): Nome da tabela ('americanas' ou 'mercadoLivre').
+        Retorno:
+                resolved_links (dict): Dicionário link -> (codigo, marca) da coleta mais recente de cada link.
+                Os links são salvos em minúsculas no banco.
+    """
+
+    if table not in ('americanas', 'mercadoLivre'):
+        raise ValueError(f'Tabela desconhecida: {table}')
+
+    # Cada coleta acrescenta uma linha por link: vale a mais recente (coluna 'coletado_em', como em create_matching_indexes)
+    query = f"""select distinct on (link) link, codigo, marca from {table}
+    where codigo is not null and marca is not null
+    order by link, coletado_em desc"""
+    cursor = connection.cursor()
+    # O alter table trava a tabela, então só roda no banco que ainda não tem a coluna
+    cursor.execute("""select 1 from information_schema.columns
+    where table_schema = current_schema() and table_name = %s and column_name = 'coletado_em'""", (table.lower(),))
+    if cursor.fetchone() is None:
+        cursor.execute(f'alter table {table} add column if not exists coletado_em timestamp default now()')
+        connection.commit()
+    cursor.execute(query)
+    resolved_links = {link: (codigo, marca) for link, codigo, marca in cursor.fetchall()}
+
+    return resolved_links
 
 
 def insert_into_mercado_livre_database(connection, df_ml):
@@ -97,26 +360,59 @@ def insert_into_mercado_livre_database(connection, df_ml):
                 df_ml (pd.Dataframe): Dataframe que será inserido no banco de dados.
     """
 
-    
-    def to_lower(value):
-        return value.lower() if isinstance(value, str) else value
+    insert_dataframe(connection=connection, table='mercadoLivre', df=df_ml)
 
 
-    cursor = connection.cursor()
 
-    for index, row in df_ml.iterrows():
-        try:
-            command = f"""INSERT INTO mercadoLivre (codigo, nome, marca, valor, link)
-            VALUES (%s, %s, %s, %s, %s)"""
-            cursor.execute(command, (to_lower(row['code']), to_lower(row['title']), to_lower(row['brand']), row['price'], to_lower(row['link'])))
-            connection.commit()
+def insert_matching_offers(connection, df_matching, commit=True):
+    """
+    Grava o resultado de utils.matching_functions.match_marketplaces na tabela 'matching_offers',
+    criada se ainda não existir. Cada execução acrescenta suas linhas com o horário da coleta.
 
-            print(f'Inserção da linha {index} bem sucedida')
+        Parâmetros:
+                connection: Objeto para manipular a conexão com o banco de dados.
+                df_matching (pd.Dataframe): Uma linha por código anatel, como retornado por match_marketplaces.
+                commit (bool): Com False, a transação fica aberta para quem chamou gravar outras tabelas junto.
+    """
 
-        except Exception as e:
-            print(f'Erro ao inserir a linha {index}: {e}')
+    columns = ['code_key', 'marketplaces', 'min_price', 'max_price', 'price_spread',
+               'cheapest_marketplace', 'cheapest_title', 'cheapest_link', 'price_americanas', 'price_mercado_livre']
+    df = df_matching.reindex(columns=columns)
+    records = list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
 
-    connection.close()
+    cursor = connection.cursor()
+    cursor.execute("""create table if not exists matching_offers (
+                          codigo text, marketplaces integer, menor_valor numeric, maior_valor numeric, diferenca numeric,
+                          marketplace_mais_barato text, nome text, link text,
+                          valor_americanas numeric, valor_mercado_livre numeric,
+                          coletado_em timestamp default now())""")
+    execute_values(cursor, """INSERT INTO matching_offers (codigo, marketplaces, menor_valor, maior_valor, diferenca,
+                              marketplace_mais_barato, nome, link, valor_americanas, valor_mercado_livre) VALUES %s""", records)
+    if commit:
+        connection.commit()
+    logging.info(f'{len(records)} códigos em comum gravados na tabela matching_offers')
+
+
+def write_results(connection, df_americanas, df_ml, df_matching):
+    """
+    Grava os produtos das duas lojas e o cruzamento entre elas em uma única transação:
+    ou tudo é gravado, ou nada é.
+
+        Parâmetros:
+                connection: Objeto para manipular a conexão com o banco de dados.
+                df_americanas (pd.Dataframe): Produtos da americanas.
+                df_ml (pd.Dataframe): Produtos do mercado livre.
+                df_matching (pd.Dataframe): Resultado de match_marketplaces.
+    """
+
+    try:
+        insert_dataframe(connection=connection, table='americanas', df=df_americanas, commit=False)
+        insert_dataframe(connection=connection, table='mercadoLivre', df=df_ml, commit=False)
+        insert_matching_offers(connection=connection, df_matching=df_matching, commit=False)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
 
 
 if __name__ == '__main__':
@@ -0,0 +1,202 @@
+import re
+import json
+from utils.parsing_functions import BRAND_LABELS
+
+
+# Scripts de estado que os sites injetam na página (Next.js, Redux etc)
+SCRIPT_PATTERN = re.compile(r'<script\b([^>]*)>(.*?)</script>', re.S | re.I)
+STATE_PATTERN = re.compile(r'(?:__PRELOADED_STATE__|__INITIAL_STATE__|__APOLLO_STATE__)\s*=\s*')
+
+LABEL_KEYS = ('name', 'label', 'key', 'title')
+VALUE_KEYS = ('value', 'value_name', 'text')
+
+# Listas de especificações: 'additionalProperty' do schema.org e as listas de atributos do estado da página
+SPEC_LIST_KEYS = ('additionalProperty', 'attributes', 'specifications', 'specs')
+
+# Listas de produtos: 'itemListElement' do ItemList (JSON-LD) e os resultados do estado da página
+PRODUCT_LIST_KEYS = ('itemListElement', 'results', 'products', 'items')
+
+# Preço sem vírgula em que o ponto separa milhares ('1.299', '12.500.000')
+THOUSANDS_PATTERN = re.compile(r'\d{1,3}(?:\.\d{3})+')
+
+
+def decode_content(content):
+    return content.decode('utf-8', errors='replace') if isinstance(content, bytes) else content
+
+
+def load_json(text):
+    try:
+        return json.loads(text, strict=False)
+    except ValueError:
+        return None
+
+
+def extract_embedded_json(content):
+    """
+    Procura os dados estruturados embutidos na página sem montar a árvore do HTML:
+    blocos JSON-LD, o script '__NEXT_DATA__' e atribuições de estado como 'window.__PRELOADED_STATE__ = {...}'.
+
+        Parâmetros:
+                content (bytes | str): HTML da página.
+
+        Retorno:
+                documents (list): Objetos JSON decodificados, na ordem em que aparecem na página.
+    """
+
+    documents = []
+    for attributes, body in SCRIPT_PATTERN.findall(decode_content(content)):
+        if 'application/ld+json' in attributes or '__NEXT_DATA__' in attributes:
+            data = load_json(body.strip())
+            if data is not None:
+                documents.append(data)
+            continue
+
+        match = STATE_PATTERN.search(body)
+        if match:
+            try:
+                data, _ = json.JSONDecoder(strict=False).raw_decode(body, match.end())
+                documents.append(data)
+            except ValueError:
+                pass
+
+    return documents
+
+
+def iter_objects(data):
+    """Percorre recursivamente todos os dicionários de um objeto JSON."""
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            yield item
+            stack.extend(reversed(list(item.values())))
+        elif isinstance(item, list):
+            stack.extend(reversed(item))
+
+
+def first_text(obj, keys):
+    for key in keys:
+        value = obj.get(key)
+        if isinstance(value, (str, int, float)) and not isinstance(value, bool) and str(value).strip():
+            return str(value).strip()
+    return None
+
+
+def parse_price(value):
+    """Converte preços em número ('1.299,90', '1.299', '1299.90', 1299.9 ou {'amount': ...})."""
+    if isinstance(value, dict):
+        value = value.get('price', value.get('amount', value.get('value', value.get('lowPrice'))))
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        text = value.replace('R$', '').strip()
+        if ',' in text:
+            text = text.replace('.', '').replace(',', '.')
+        elif THOUSANDS_PATTERN.fullmatch(text):
+            text = text.replace('.', '')
+        try:
+            return float(text)
+        except ValueError:
+            return None
+    return None
+
+
+def product_price(obj):
+    """Preço de um produto do JSON: 'offers' do schema.org ou um campo 'price' direto."""
+    offers = obj.get('offers')
+    if isinstance(offers, list):
+        offers = offers[0] if offers else None
+    if isinstance(offers, dict):
+        return parse_price(offers)
+    return parse_price(obj.get('price'))
+
+
+def iter_lists(data, keys):
+    """Percorre as listas guardadas sob as chaves 'keys' em qualquer nível do objeto JSON."""
+    for obj in iter_objects(data):
+        for key in keys:
+            value = obj.get(key)
+            if isinstance(value, list):
+                yield value
+
+
+def list_products(items):
+    """Linhas {'title', 'price', 'link'} dos itens de uma lista de produtos, sem links repetidos."""
+    rows = []
+    seen = set()
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        # ListItem do JSON-LD: o produto fica em 'item'
+        if isinstance(item.get('item'), dict):
+            item = {**item, **item['item']}
+
+        title = first_text(item, ('name', 'title'))
+        link = first_text(item, ('url', 'permalink', 'link'))
+        price = product_price(item)
+        if title is None or link is None or price is None or link in seen:
+            continue
+
+        seen.add(link)
+        rows.append({'title': title, 'price': price, 'link': link})
+    return rows
+
+
+def extract_listing_products(content):
+    """
+    Extrai os produtos da grade de uma página de listagem a partir do JSON embutido.
+    Só são lidas as listas de produtos (o 'itemListElement' do JSON-LD ou os resultados do estado da página),
+    e entre elas vale a maior: carrosséis de recomendados e patrocinados, menores, não entram na grade.
+
+        Parâmetros:
+                content (bytes | str): HTML da página.
+
+        Retorno:
+                rows (list): Linhas {'title', 'price', 'link'}, com o link como aparece na página.
+                Retorna None se a página não tiver JSON com produtos, para que o DOM seja usado.
+    """
+
+    rows = []
+    for document in extract_embedded_json(content):
+        for items in iter_lists(document, PRODUCT_LIST_KEYS):
+            candidate = list_products(items)
+            if len(candidate) > len(rows):
+                rows = candidate
+
+    return rows or None
+
+
+def extract_embedded_specs(content):
+    """
+    Extrai as especificações do produto a partir do JSON embutido na página: os pares nome/valor das listas
+    de especificações ('additionalProperty' do schema.org ou as listas de atributos do estado da página), em uma
+    única passada. Pares nome/valor fora dessas listas (perguntas, avaliações, frete) são ignorados.
+    A marca do Product (JSON-LD) entra como 'Marca' se a página não tiver esse atributo.
+
+        Parâmetros:
+                content (bytes | str): HTML da página.
+
+        Retorno:
+                specs (dict): Especificações (nome -> valor), na ordem em que aparecem. Vazio se não houver JSON.
+    """
+
+    specs = {}
+    brand = None
+    for document in extract_embedded_json(content):
+        for obj in iter_objects(document):
+            if brand is None and 'Product' in str(obj.get('@type', '')):
+                value = obj.get('brand')
+                brand = first_text(value, ('name',)) if isinstance(value, dict) else first_text(obj, ('brand',))
+
+        for items in iter_lists(document, SPEC_LIST_KEYS):
+            for item in items:
+                if not isinstance(item, dict):
+                    continue
+                label = first_text(item, LABEL_KEYS)
+                value = first_text(item, VALUE_KEYS)
+                if label is not None and value is not None:
+                    specs.setdefault(label, value)
+
+    if brand is not None and not any(label.lower() in BRAND_LABELS for label in specs):
+        specs['Marca'] = brand
+    return specs
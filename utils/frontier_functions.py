@@ -0,0 +1,104 @@
+import hashlib
+import math
+import os
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+
+# Parâmetros de rastreamento que fazem o mesmo produto parecer um link diferente
+TRACKING_PARAMETERS = {'tracking_id', 'searchVariation', 'position', 'search_layout', 'type', 'polycard_client',
+                       'sid', 'wid', 'chave', 'is_advertising', 'fbclid', 'gclid', 'origin', 'source'}
+TRACKING_PREFIXES = ('utm_', 'pfm_', 'reco_', 'ad_', 'matt_', 'c_')
+
+
+def is_tracking_parameter(name):
+    return name in TRACKING_PARAMETERS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url):
+    """
+    Gera a forma canônica da URL de um produto: esquema e host em minúsculas, sem fragmento,
+    sem parâmetros de rastreamento, com a query ordenada e sem barra final.
+
+        Parâmetros:
+                url (str): URL do produto.
+
+        Retorno:
+                URL canônica.
+    """
+
+    parts = urlsplit(url.strip())
+    query = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True) if not is_tracking_parameter(name)]
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(sorted(query)), ''))
+
+
+class BloomFilter():
+    """Filtro de Bloom compacto para guardar os links já vistos entre execuções."""
+
+    def __init__(self, capacity=1_000_000, error_rate=0.01):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, item):
+        digest = hashlib.sha256(item.encode('utf-8')).digest()
+        first = int.from_bytes(digest[:8], 'big')
+        second = int.from_bytes(digest[8:16], 'big')
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self.positions(item):
+            self.bits[position // 8] |= 1 << (position % 8)
+
+    def __contains__(self, item):
+        return all(self.bits[position // 8] & (1 << (position % 8)) for position in self.positions(item))
+
+    def save(self, path):
+        with open(path, 'wb') as file:
+            file.write(self.size.to_bytes(8, 'big') + self.hashes.to_bytes(2, 'big') + bytes(self.bits))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as file:
+            data = file.read()
+        bloom = cls.__new__(cls)
+        bloom.size = int.from_bytes(data[:8], 'big')
+        bloom.hashes = int.from_bytes(data[8:10], 'big')
+        bloom.bits = bytearray(data[10:])
+        return bloom
+
+
+class Frontier():
+    """
+    Fronteira da coleta: admite cada produto, pela URL canônica, uma única vez por execução.
+    Com 'seen_path', os links admitidos também são guardados em um filtro de Bloom em disco,
+    e produtos vistos em execuções anteriores deixam de ser admitidos.
+    """
+
+    def __init__(self, seen_path=None, capacity=1_000_000, error_rate=0.01):
+        self.seen = set()
+        self.lock = threading.Lock()
+        self.seen_path = seen_path
+        self.bloom = None
+
+        if seen_path:
+            self.bloom = BloomFilter.load(seen_path) if os.path.exists(seen_path) else BloomFilter(capacity, error_rate)
+
+    def admit(self, url):
+        """Retorna a URL canônica se o produto ainda não foi visto, ou None se for repetido."""
+        canonical = canonicalize_url(url)
+        with self.lock:
+            if canonical in self.seen or (self.bloom is not None and canonical in self.bloom):
+                return None
+            self.seen.add(canonical)
+            return canonical
+
+    def save(self):
+        """Grava no filtro de Bloom em disco os links admitidos nesta execução."""
+        if self.bloom is None:
+            return
+        with self.lock:
+            for url in self.seen:
+                self.bloom.add(url)
+            self.bloom.save(self.seen_path)
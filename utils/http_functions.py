@@ -0,0 +1,122 @@
+import threading
+import time
+import requests
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from utils.rate_limit_functions import rate_limiter as shared_rate_limiter, is_blocked_response
+from utils.cache_functions import build_response
+from utils.metrics_functions import metrics
+
+
+class SessionPool():
+    """
+    Mantém uma requests.Session com conexões keep-alive para cada proxy.
+    As sessões nunca são compartilhadas entre proxies, então uma conexão aberta através de um
+    proxy não é reutilizada por outro. O tamanho do pool de conexões acompanha o número de threads.
+    """
+
+    def __init__(self, pool_size=10):
+        self.pool_size = pool_size
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def create_session(self):
+        """Cria uma sessão com adaptadores HTTP dimensionados para 'pool_size' conexões por host."""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def get_session(self, proxies=None):
+        """Retorna a sessão do proxy informado, criando-a se necessário."""
+        key = tuple(sorted(proxies.items())) if proxies else None
+        with self.lock:
+            if key not in self.sessions:
+                self.sessions[key] = self.create_session()
+            return self.sessions[key]
+
+    def close(self):
+        """Fecha todas as sessões e suas conexões."""
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
+
+
+# Pool de sessões usado quando o scraper não fornece o seu.
+session_pool = SessionPool()
+
+
+def record_request(url, seconds, response=None):
+    """Registra nas métricas o status, a latência e os bytes de uma requisição. Sem resposta, conta como erro."""
+    host = urlsplit(url).netloc
+    metrics.observe('http_request_seconds', seconds, host=host)
+    if response is None:
+        metrics.inc('http_requests_total', host=host, status='error')
+        return
+
+    metrics.inc('http_requests_total', host=host, status=response.status_code)
+    metrics.inc('http_bytes_total', len(response.content), host=host)
+
+
+def fetch(url, headers, proxies=None, verify=True, timeout=30, rate_limiter=None, sessions=None, proxy_manager=None, cache=None):
+    """
+    Realiza uma requisição GET passando pelo limitador de taxa do host e reutilizando
+    a sessão keep-alive do proxy.
+
+        Parâmetros:
+                url (str): URL que será requisitada.
+                headers (dict): Headers da requisição.
+                proxies (dict): Proxy utilizado na requisição. Se não for informado, é escolhido pelo 'proxy_manager'.
+                verify (bool): Se o certificado TLS deve ser verificado.
+                timeout (int): Tempo máximo de espera, em segundos.
+                rate_limiter (RateLimiter): Limitador utilizado. Por padrão, o limitador compartilhado.
+                sessions (SessionPool): Pool de sessões utilizado. Por padrão, o pool compartilhado.
+                proxy_manager (ProxyManager): Gerenciador que escolhe o proxy e recebe o resultado da requisição.
+                cache (HttpCache): Cache em disco consultado antes da requisição e revalidado com requisições condicionais.
+
+        Retorno:
+                response (requests.Response): Resposta da requisição.
+    """
+
+    rate_limiter = rate_limiter or shared_rate_limiter
+    sessions = sessions or session_pool
+
+    cached = cache.get(url) if cache is not None else None
+    if cached is not None:
+        meta, body = cached
+        if cache.is_fresh(meta):
+            metrics.inc('cache_requests_total', result='hit')
+            return build_response(url, body)
+        headers = {**headers, **cache.conditional_headers(meta)}
+
+    if proxy_manager is not None and proxies is None:
+        proxies = proxy_manager.get_proxy()
+
+    rate_limiter.acquire(url)
+    session = sessions.get_session(proxies)
+    start = time.monotonic()
+    try:
+        response = session.get(url, headers=headers, proxies=proxies, verify=verify, timeout=timeout)
+    except requests.RequestException:
+        record_request(url, time.monotonic() - start)
+        if proxy_manager is not None:
+            proxy_manager.report(proxies, latency=time.monotonic() - start, error=True)
+        raise
+
+    record_request(url, time.monotonic() - start, response)
+    if proxy_manager is not None:
+        proxy_manager.report(proxies, latency=time.monotonic() - start, banned=is_blocked_response(response))
+    rate_limiter.feedback(url, response)
+
+    if cache is not None:
+        if response.status_code == 304 and cached is not None:
+            metrics.inc('cache_requests_total', result='revalidated')
+            cache.touch(url, meta)
+            return build_response(url, body)
+        metrics.inc('cache_requests_total', result='miss')
+        if response.status_code == 200 and not is_blocked_response(response):
+            cache.put(url, response)
+
+    return response
@@ -0,0 +1,83 @@
+import pandas as pd
+
+
+# Sequência de dígitos com separadores (espaço, ponto, hífen) que forma o código anatel
+ANATEL_CODE_PATTERN = r'(\d[\d\s.\-/]{4,}\d)'
+
+
+def normalize_anatel_codes(codes):
+    """
+    Normaliza os códigos anatel de uma série, sem percorrer as linhas em Python.
+    Extrai a sequência de dígitos do texto, remove espaços, pontos e hífens e descarta zeros à esquerda,
+    de forma que '01234-56-78901', '1234 56 78901' e 'Anatel: 123456-78901' virem a mesma chave.
+
+        Parâmetros:
+                codes (pd.Series): Série com os códigos como foram extraídos das páginas.
+
+        Retorno:
+                pd.Series: Série com os códigos normalizados (NA quando não há código).
+    """
+
+    normalized = (codes.astype('string')
+                       .str.extract(ANATEL_CODE_PATTERN, expand=False)
+                       .str.replace(r'\D', '', regex=True)
+                       .str.lstrip('0'))
+    return normalized.replace('', pd.NA)
+
+
+def build_code_index(df, marketplace, code_column='code'):
+    """
+    Monta o índice de ofertas de um marketplace pela chave normalizada do código anatel.
+
+        Parâmetros:
+                df (pd.Dataframe): Dataframe com as colunas title, price, link e o código.
+                marketplace (str): Nome do marketplace das ofertas.
+                code_column (str): Nome da coluna com o código anatel.
+
+        Retorno:
+                offers (pd.Dataframe): Ofertas com as colunas code_key, marketplace, title, price e link.
+    """
+
+    offers = pd.DataFrame({'code_key': normalize_anatel_codes(df[code_column]),
+                           'marketplace': marketplace,
+                           'title': df['title'],
+                           'price': pd.to_numeric(df['price'], errors='coerce'),
+                           'link': df['link']})
+    return offers.dropna(subset=['code_key', 'price'])
+
+
+def match_marketplaces(frames, min_marketplaces=2):
+    """
+    Cruza as ofertas de N marketplaces pelo código anatel normalizado em uma única passada vetorizada.
+    Para cada código presente em pelo menos 'min_marketplaces' lojas, retorna a oferta mais barata,
+    o menor preço de cada loja e a diferença entre o maior e o menor preço.
+
+        Parâmetros:
+                frames (dict): Dicionário nome do marketplace -> dataframe com code, title, price e link.
+                min_marketplaces (int): Quantidade mínima de lojas em que o código precisa aparecer.
+
+        Retorno:
+                df_matching (pd.Dataframe): Uma linha por código, ordenada pela maior diferença de preço.
+    """
+
+    offers = pd.concat([build_code_index(df, marketplace) for marketplace, df in frames.items()], ignore_index=True)
+    offers = offers.sort_values('price', kind='stable')
+
+    stats = offers.groupby('code_key').agg(marketplaces=('marketplace', 'nunique'),
+                                           offers=('price', 'size'),
+                                           min_price=('price', 'min'),
+                                           max_price=('price', 'max'))
+    stats = stats[stats['marketplaces'] >= min_marketplaces]
+
+    cheapest = (offers.drop_duplicates('code_key')
+                      .set_index('code_key')[['marketplace', 'title', 'link']]
+                      .rename(columns={'marketplace': 'cheapest_marketplace', 'title': 'cheapest_title', 'link': 'cheapest_link'}))
+
+    prices = offers.pivot_table(index='code_key', columns='marketplace', values='price', aggfunc='min')
+    prices.columns = [f'price_{marketplace}' for marketplace in prices.columns]
+
+    df_matching = stats.join(cheapest, how='left').join(prices, how='left')
+    df_matching['price_spread'] = df_matching['max_price'] - df_matching['min_price']
+    df_matching['price_spread_pct'] = df_matching['price_spread'] / df_matching['min_price']
+
+    return df_matching.sort_values('price_spread', ascending=False).reset_index()
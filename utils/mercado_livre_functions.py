@@ -1,133 +1,166 @@
-import requests
-import threading
-import queue
-import pandas as pd
-import psycopg2
+import logging
+from itertools import count
 import html
-from bs4 import BeautifulSoup
-from concurrent.futures import ThreadPoolExecutor
+from utils.crawler_functions import Crawler
+from utils.parsing_functions import make_soup, code_and_brand, MERCADO_LIVRE_LISTING_STRAINER, MERCADO_LIVRE_PRODUCT_STRAINER
+from utils.embedded_json_functions import decode_content, extract_listing_products, extract_embedded_specs
 
+CODE_LABELS = ['Código de homologação (Anatel', 'Codigo Homolog (ANATEL)', 'Homologação Anatel Nº', 'Número de homologação da Anatel']
+NEXT_PAGE_CLASS = 'andes-pagination__link'
 
-class MercadoLivre():
-    """Classe para realizar webScraping no site do mercado livre."""
 
-    def __init__(self, url, headers, num_threads):
-        self.url = url
-        self.headers = headers
-        self.num_threads = num_threads
-        self.products_links_queue = queue.Queue()
-        self.codes_lock = threading.Lock()
-        self.size = 1
-        self.codes_dict = {}
-        self.brand_dict = {}
-        self.brand_lock = threading.Lock()
-        self.all_rows = []
-        self.amount_of_products = 1501 #30 páginas
+def extract_products(soup):
+    """
+    Pega o título, preço e link de todos os produtos existentes em uma página de listagem.
 
+        Parâmetros:
+                soup: objeto BeautifulSoup
 
-    def get_products(self, soup):
-        """
-        Pega o título, preço e link de todos os produtos existentes na página atual do site.
-        Essas informações são salvas em um dicionário.
-        O link de cada produto é salvo em uma fila (queue) para serem processador por threads futuramente.
+        Retorno:
+                rows (list): Lista de dicionários com title, price e link de cada produto.
+                Quantidade de cards de produto encontrados na página.
+    """
 
-            Parâmetros:
-                    soup: objeto BeautifulSoup
+    rows = []
+    products = soup.find_all('div', attrs={'class':'andes-card ui-search-result ui-search-result--core andes-card--flat andes-card--padding-16'})
 
-            Retorno:
-                    Atualização dos atributos 'all_rows' e 'products_links_queue', inicialmente criados na função
-                    __init__ da classe.
+    for p in products:
+        title = p.find('h2',attrs={'class':'ui-search-item__title ui-search-item__group__element'}).text   
+        price_str = p.find('span', attrs={'class':'andes-money-amount__fraction'})
 
-        """
+        if price_str == None:
+            break
+        else:
+            price_str = price_str.text
+            price = price_str.replace('.', '').replace(',', '.').replace('R$', '')
+            price = float(price)
 
-        products = soup.findAll('div', attrs={'class':'andes-card ui-search-result ui-search-result--core andes-card--flat andes-card--padding-16'})
+            individual_link_tag = p.find('a', attrs={'class':'ui-search-link__title-card ui-search-link'})
 
-        for p in products:
-            title = p.find('h2',attrs={'class':'ui-search-item__title ui-search-item__group__element'}).text   
-            price_str = p.find('span', attrs={'class':'andes-money-amount__fraction'})
-           
-            if price_str == None:
-                break
+            if individual_link_tag:
+                rows.append({'title': title, 'price': price, 'link': html.unescape(individual_link_tag['href'])})
             else:
-                price_str = price_str.text
-                price = price_str.replace('.', '').replace(',', '.').replace('R$', '')
-                price = float(price)
-
-                individual_link_tag = p.find('a', attrs={'class':'ui-search-link__title-card ui-search-link'})
-                
-                if individual_link_tag:
-                    individual_link = html.unescape(individual_link_tag['href'])
-                    self.all_rows.append({'title': title, 'price': price, 'link': individual_link})
-                    self.products_links_queue.put(individual_link)
-                else:
-                    print("Link do produto não encontrado para:", title)
-
-
-                self.all_rows.append({'title': title, 'price': price, 'link': individual_link})
-                self.products_links_queue.put(individual_link)
-
-
-    def get_brand(self, link, soup):
-        try:
-            tag_brand = soup.find('th', text='Marca')
-            if tag_brand:
-                brand = tag_brand.find_next('td').text.strip()
-                with self.brand_lock:
-                    self.brand_dict[link] = brand
-            else:
-                print(f"Marca não encontrada para o link: {link}")
-                brand = None
-        except Exception as e:
-            print(f'Erro ao processar a marca no link {link}: {e}')
-            brand = None
+                logging.debug(f'Link do produto não encontrado para: {title}')
 
-        return self.brand_dict
+    return rows, len(products)
 
 
+def has_next_page(soup):
+    """
+    Verifica se a página de listagem possui o link para a próxima página.
+    """
 
-    def get_anatel_code(self, link, iterator):
-        """Função para pegar o código anatel de cada produto capturado pelo getProducts.
-        O código anatel será utilizado como um id único para cada produto.
-            Parâmetros:
-                link (str): Link para o produto do qual pegaremos o código anatel.
-                iterator: Iterador que percorre cada link
-            Retorno:
-                codes_dict (dict): Dicionário com o código anatel relacionado a cada link.
-        """
-        try:
-            tag_code = iterator.find_next('span', class_='andes-table__column--value')
-            code = tag_code.text.replace('-', '') if tag_code != None else None
-            with self.codes_lock:
-                self.codes_dict[link] = code
+    return soup.find('a', {'class':NEXT_PAGE_CLASS}) is not None
 
-        except Exception as e:
-            print(f'Erro ao processar {link}: {e}')
 
-        return self.codes_dict
+def extract_specs(soup):
+    """
+    Lê a tabela de especificações de um produto em uma única passada, linha a linha
+    (nome no 'th' e valor no 'td').
 
+        Parâmetros:
+                soup: objeto BeautifulSoup da página do produto.
 
-    def get_anatel_code_and_brand(self, link):
-        try:
-            request = requests.get(link, headers=self.headers)
-            soup = BeautifulSoup(request.content, 'html.parser')
+        Retorno:
+                specs (dict): Especificações (nome -> valor), como 'Marca', 'Modelo', 'Cor',
+                'Memória interna', 'Memória RAM' e o código anatel.
+    """
 
-            html_tag = soup.find_all('div', class_='andes-table__header__container')
+    specs = {}
+    for row in soup.find_all('tr'):
+        header = row.find('th')
+        value = row.find('td')
+        if header is not None and value is not None:
+            specs.setdefault(header.get_text(strip=True), value.get_text(strip=True))
+    return specs
 
-            code = None
-            brand = None
 
-            for tag in html_tag:
-                if any(substring in tag.get_text(strip=True) for substring in ['Código de homologação (Anatel', 'Codigo Homolog (ANATEL)', 'Homologação Anatel Nº', 'Número de homologação da Anatel']):
-                    code = self.get_anatel_code(link=link, iterator=tag)
+def extract_anatel_code_and_brand(soup):
+    """
+    Extrai o código anatel e a marca da tabela de especificações de um produto.
 
-                if 'Marca' in tag.get_text(strip=True):  
-                    brand = self.get_brand(link=link, soup=soup)  
+        Parâmetros:
+                soup: objeto BeautifulSoup da página do produto.
 
-            return code, brand
+        Retorno:
+                code (str): Código anatel sem hífens, ou None.
+                brand (str): Marca do produto, ou None.
+    """
 
-        except Exception as e:
-            print(f'Erro ao processar {link}: {e}')
-            return None, None 
+    return code_and_brand(extract_specs(soup), CODE_LABELS)
+
+
+def parse_listing_page(content):
+    """
+    Faz o parse de uma página de listagem. Por ser uma função de módulo, pode ser executada
+    em um pool de processos. Os produtos são lidos do JSON embutido na página (JSON-LD ou estado
+    pré-carregado); o soup, que depende das classes CSS, só é montado quando não há JSON.
+
+        Retorno:
+                Linhas extraídas, quantidade de cards e se existe próxima página.
+    """
+
+    text = decode_content(content)
+    rows = extract_listing_products(text)
+    if rows is not None:
+        return rows, len(rows), NEXT_PAGE_CLASS in text
+
+    soup = make_soup(content, parse_only=MERCADO_LIVRE_LISTING_STRAINER)
+    rows, amount = extract_products(soup)
+    return rows, amount, has_next_page(soup)
+
+
+def parse_product_page(content):
+    """
+    Faz o parse de uma página de produto. Por ser uma função de módulo, pode ser executada
+    em um pool de processos. As especificações são lidas do JSON embutido na página;
+    a tabela de especificações só é percorrida quando o código anatel não está no JSON.
+
+        Retorno:
+                specs (dict): Todas as especificações do produto (nome -> valor).
+    """
+
+    specs = extract_embedded_specs(content)
+    if code_and_brand(specs, CODE_LABELS)[0] is None:
+        specs = {**extract_specs(make_soup(content, parse_only=MERCADO_LIVRE_PRODUCT_STRAINER)), **specs}
+    return specs
+
+
+class MercadoLivre(Crawler):
+    """Classe para realizar webScraping no site do mercado livre."""
+
+    # Label usado nas métricas
+    name = 'mercado_livre'
+    display_name = 'Mercado Livre'
+    code_labels = CODE_LABELS
+    listing_parser = staticmethod(parse_listing_page)
+    product_parser = staticmethod(parse_product_page)
+
+    def __init__(self, url, headers, num_threads, amount_of_products=1501, **kwargs):
+        # 1501 = 30 páginas. Com None, a paginação segue até a última página da categoria
+        super().__init__(url, headers, num_threads, amount_of_products=amount_of_products, **kwargs)
+        self.size = 1
+
+
+    def get_products(self, soup):
+        """
+        Pega o título, preço e link de todos os produtos existentes na página atual do site.
+        Essas informações são salvas em um dicionário.
+        O link de cada produto é salvo em uma fila (queue) para serem processador por threads futuramente.
+
+            Parâmetros:
+                    soup: objeto BeautifulSoup
+
+            Retorno:
+                    Atualização dos atributos 'pending_rows' e 'products_links_queue', inicialmente criados na função
+                    __init__ da classe.
+                    Quantidade de produtos encontrados na página.
+
+        """
+
+        rows, amount = extract_products(soup)
+        self.add_products(rows)
+        return amount
 
 
 
@@ -144,53 +177,57 @@ class MercadoLivre():
                     Link para a próxima página.
         """
 
-        next_button = soup.find('a', {'class':'andes-pagination__link'})
-        return f'celular_Desde_{self.size}_NoIndex_True' if next_button else None
+        return f'celular_Desde_{self.size}_NoIndex_True' if has_next_page(soup) else None
+
+
+    def listing_url(self):
+        """
+        URL da página de listagem no cursor atual ('size').
+        """
+
+        return f"{self.url}celular_Desde_{self.size}_NoIndex_True"
 
 
-    
-    def main(self):
+    def listing_urls(self):
         """
-        Função principal, responsável por chamar e conectar todas as outras funções.
-        Aqui, ocorre a chamada das threads e a passagem de parâmetros para as funções.
+        Gera, sob demanda, as URLs das páginas de listagem a partir do cursor atual ('size'), até 'amount_of_products',
+        em passos de 50 produtos. Com 'amount_of_products' None, não há limite: quem consome para na primeira página vazia.
 
             Retorno:
-                    df_ml (pd.Dataframe): Dataframe com as informações de cada produto.
+                    urls (generator): URLs das páginas de listagem.
         """
 
-        while True:
-            current_url = f"{self.url}celular_Desde_{self.size}_NoIndex_True"
-            print(f'current_url = {current_url}')
-            request = requests.get(current_url, headers=self.headers)
-            soup = BeautifulSoup(request.content, 'html.parser')
+        sizes = count(self.size, 50) if self.amount_of_products is None else range(self.size, self.amount_of_products + 1, 50)
+        return (f"{self.url}celular_Desde_{size}_NoIndex_True" for size in sizes)
 
-            self.get_products(soup)
 
-            next_params = self.next_page(soup)
-            if not next_params or self.size == self.amount_of_products: 
-                break
+    def advance(self, pages=1):
+        """
+        Avança o cursor em 'pages' páginas de 50 produtos.
+        """
 
-            self.size += 50
+        self.size += 50 * pages
 
-        with ThreadPoolExecutor(max_workers=self.num_threads) as executor:
-            while not self.products_links_queue.empty():
-                link = self.products_links_queue.get()
-                executor.submit(self.get_anatel_code_and_brand, link)
 
-        df_ml = pd.DataFrame(self.all_rows)
+    def listing_exhausted(self):
+        """
+        Indica se o cursor chegou a 'amount_of_products'.
+        """
 
+        return self.amount_of_products is not None and self.size >= self.amount_of_products
 
-        df_ml['code'] = df_ml['link'].map(self.codes_dict)
-        df_ml['brand'] = df_ml['link'].map(self.brand_dict)
 
-        df_ml = df_ml.dropna(subset=['code'])
-        df_ml = df_ml[df_ml['code'] != 'Null']
+    def cursor_state(self):
+        """
+        Cursor da paginação ('size'), gravado no checkpoint.
+        """
 
-        df_ml = df_ml.dropna(subset=['price'])
-        df_ml = df_ml[df_ml['price'] > 0]
+        return {'size': self.size}
 
-        return df_ml
-       
 
-   
-    
\ No newline at end of file
+    def restore_cursor(self, state):
+        """
+        Restaura o cursor da paginação a partir do checkpoint.
+        """
+
+        self.size = state['size']
@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Limites (em segundos) dos buckets dos histogramas de latência
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+PREFIX = 'scraper_'
+
+DESCRIPTIONS = {'http_requests_total': 'Requisições HTTP por host e status.',
+                'http_bytes_total': 'Bytes baixados por host.',
+                'http_request_seconds': 'Latência das requisições HTTP por host.',
+                'cache_requests_total': 'Consultas ao cache em disco por resultado.',
+                'proxy_requests_total': 'Requisições por proxy e resultado.',
+                'stage_seconds': 'Duração de cada etapa da coleta.',
+                'extraction_total': 'Campos encontrados (hit) e não encontrados (miss) nas páginas de produto.',
+                'errors_total': 'Erros por etapa.',
+                'queue_depth': 'Tamanho das filas da coleta.',
+                'rows_total': 'Linhas coletadas.',
+                'db_rows_total': 'Linhas gravadas no banco por resultado.',
+                'db_write_seconds': 'Duração da gravação no banco.'}
+
+
+class Histogram():
+    """Histograma com buckets fixos, no formato do Prometheus."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def quantile(self, q):
+        """Quantil aproximado pelo limite superior do bucket em que ele cai."""
+        if not self.count:
+            return None
+
+        target = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return float('inf')
+
+    def as_dict(self):
+        return {'count': self.count,
+                'sum': self.sum,
+                'mean': self.sum / self.count if self.count else None,
+                'p50': self.quantile(0.5),
+                'p95': self.quantile(0.95)}
+
+
+def label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def format_labels(key, extra=()):
+    labels = list(key) + list(extra)
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels) + '}'
+
+
+def proxy_label(proxy):
+    """Identifica o proxy pelo host e porta, sem expor usuário e senha nas métricas."""
+    if not proxy:
+        return 'direct'
+    parts = urlsplit(proxy.get('https') or proxy.get('http') or '')
+    return f'{parts.hostname}:{parts.port}' if parts.port else str(parts.hostname)
+
+
+def timed(function, *args):
+    """Executa a função e retorna (resultado, segundos). Usada para medir o parse dentro do pool de processos."""
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+class Metrics():
+    """
+    Registro de métricas da coleta: contadores, gauges e histogramas com labels.
+    É compartilhado pelas threads e pode ser exportado no formato texto do Prometheus
+    (arquivo ou endpoint HTTP) e como um resumo em JSON ao final da execução.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Descarta todas as métricas registradas."""
+        with self.lock:
+            self.counters = {}
+            # (nome, labels) -> [valor atual, maior valor]
+            self.gauges = {}
+            self.histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        """Incrementa um contador."""
+        key = (name, label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        """Atualiza um gauge, guardando também o maior valor já observado."""
+        key = (name, label_key(labels))
+        with self.lock:
+            current = self.gauges.get(key)
+            self.gauges[key] = [value, value if current is None else max(current[1], value)]
+
+    def observe(self, name, value, **labels):
+        """Registra uma observação (em segundos) no histograma."""
+        key = (name, label_key(labels))
+        with self.lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Mede a duração do bloco e registra no histograma."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def to_prometheus(self):
+        """Exporta as métricas no formato texto do Prometheus."""
+        with self.lock:
+            lines = []
+            for kind, values in (('counter', self.counters), ('gauge', self.gauges), ('histogram', self.histograms)):
+                for name in sorted({name for name, _ in values}):
+                    if name in DESCRIPTIONS:
+                        lines.append(f'# HELP {PREFIX}{name} {DESCRIPTIONS[name]}')
+                    lines.append(f'# TYPE {PREFIX}{name} {kind}')
+
+                    for (metric, key), value in sorted(values.items()):
+                        if metric != name:
+                            continue
+                        if kind == 'counter':
+                            lines.append(f'{PREFIX}{name}{format_labels(key)} {value}')
+                        elif kind == 'gauge':
+                            lines.append(f'{PREFIX}{name}{format_labels(key)} {value[0]}')
+                        else:
+                            cumulative = 0
+                            for bound, count in zip(value.buckets, value.counts):
+                                cumulative += count
+                                lines.append(f'{PREFIX}{name}_bucket{format_labels(key, [("le", bound)])} {cumulative}')
+                            lines.append(f'{PREFIX}{name}_bucket{format_labels(key, [("le", "+Inf")])} {value.count}')
+                            lines.append(f'{PREFIX}{name}_sum{format_labels(key)} {value.sum}')
+                            lines.append(f'{PREFIX}{name}_count{format_labels(key)} {value.count}')
+            return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """Resumo das métricas em um dicionário, indexado por 'nome{labels}'."""
+        with self.lock:
+            return {'counters': {name + format_labels(key): value for (name, key), value in sorted(self.counters.items())},
+                    'gauges': {name + format_labels(key): {'current': value[0], 'max': value[1]}
+                               for (name, key), value in sorted(self.gauges.items())},
+                    'histograms': {name + format_labels(key): value.as_dict()
+                                   for (name, key), value in sorted(self.histograms.items())}}
+
+    def write_prometheus(self, path):
+        """Grava as métricas em um arquivo de texto (para o textfile collector do node_exporter)."""
+        temporary_path = f'{path}.tmp'
+        with open(temporary_path, 'w') as file:
+            file.write(self.to_prometheus())
+        os.replace(temporary_path, path)
+
+    def write_summary(self, path):
+        """Grava o resumo da execução em JSON."""
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.summary(), file, ensure_ascii=False, indent=2)
+
+    def serve(self, port, host='0.0.0.0'):
+        """Expõe as métricas em http://host:port/metrics em uma thread de fundo. Retorna o servidor."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = registry.to_prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+# Registro compartilhado por todos os módulos.
+metrics = Metrics()
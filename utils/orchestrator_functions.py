@@ -0,0 +1,178 @@
+import os
+import time
+import socket
+import logging
+import multiprocessing
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from utils.pipeline_functions import MARKETPLACES, TABLES, scraper_class, load_headers
+from utils.database_functions import database_connection, get_resolved_links
+from utils.cache_functions import HttpCache
+from utils.metrics_functions import metrics
+from utils.sink_functions import SCHEMA, open_sink
+from utils.work_queue_functions import LeaseHeartbeat
+
+
+def new_run():
+    """Identificação de uma nova geração de tarefas: cada geração tem a sua própria fronteira."""
+    return f"{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}"
+
+
+def build_tasks(categories, max_products=None, run=None):
+    """
+    Transforma o dicionário marketplace -> lista de URLs de categoria/filtro em tarefas (shards) para a fila.
+
+        Parâmetros:
+                categories (dict): URLs de categoria de cada marketplace.
+                max_products (int): Limite de produtos por categoria. Com None, cada shard percorre a categoria inteira.
+                run (str): Geração das tarefas. Com None, uma nova geração é criada.
+
+        Retorno:
+                tasks (list): Tarefas {'marketplace', 'url', 'max_products', 'run'}.
+    """
+
+    run = run or new_run()
+    tasks = []
+    for marketplace, urls in categories.items():
+        if marketplace not in MARKETPLACES:
+            raise ValueError(f'Marketplace desconhecido: {marketplace}')
+        for url in urls:
+            tasks.append({'marketplace': marketplace, 'url': url, 'max_products': max_products, 'run': run})
+    return tasks
+
+
+def build_scraper(task, options, frontier, known_products):
+    """Monta o scraper do shard. 'options' contém apenas valores serializáveis, para atravessar processos e máquinas."""
+    options = dict(options)
+    cache_dir = options.pop('cache_dir', None)
+    output = options.pop('output', None)
+    headers = options.pop('headers') if 'headers' in options else load_headers(task['marketplace'])
+
+    scraper = scraper_class(task['marketplace'])
+    return scraper(url=task['url'],
+                   headers=headers,
+                   frontier=frontier,
+                   known_products=known_products,
+                   cache=HttpCache(cache_dir) if cache_dir else None,
+                   sink=open_sink(os.path.join(output, task['marketplace'], f"shard-{task['id']}")) if output else None,
+                   amount_of_products=task.get('max_products'),
+                   **options)
+
+
+def shard_stats(task, scraper, df, seconds):
+    """Estatísticas de vazão de um shard, a partir das métricas registradas durante a sua coleta."""
+    with metrics.lock:
+        requests = sum(value for (name, _), value in metrics.counters.items() if name == 'http_requests_total')
+    return {'id': task['id'],
+            'marketplace': task['marketplace'],
+            'url': task['url'],
+            'worker': task['worker'],
+            'rows': len(df),
+            'requests': requests,
+            'failed_links': len(scraper.failed_links),
+            'seconds': round(seconds, 3),
+            'rows_per_second': round(len(df) / seconds, 3) if seconds else None,
+            'requests_per_second': round(requests / seconds, 3) if seconds else None}
+
+
+def run_shard_worker(queue, options, worker_id=None, incremental=True):
+    """
+    Worker da coleta distribuída: reserva tarefas na fila até ela esvaziar e coleta cada categoria com o
+    scraper do marketplace. Todos os workers (em qualquer processo ou máquina) usam a mesma fronteira da
+    geração das tarefas, então cada produto é coletado por um único shard. A reserva é renovada enquanto o
+    shard roda; se ela for perdida mesmo assim, o shard é de outro worker e o resultado é descartado.
+
+        Parâmetros:
+                queue (FileWorkQueue | DatabaseWorkQueue): Fila de tarefas.
+                options (dict): Argumentos de cada scraper, por marketplace ('num_threads', 'cache_dir', 'output', ...).
+                worker_id (str): Identificação do worker. Por padrão, host e pid.
+                incremental (bool): Carrega do banco os produtos já resolvidos, como na coleta de uma categoria.
+
+        Retorno:
+                results (list): Tuplas (dataframe, estatísticas) dos shards processados por este worker.
+    """
+
+    worker_id = worker_id or f'{socket.gethostname()}-{os.getpid()}'
+    known_products = {}
+    results = []
+
+    while True:
+        claimed = queue.claim(worker_id)
+        if claimed is None:
+            break
+
+        task_id, task = claimed
+        task = {**task, 'id': str(task_id)}
+        marketplace = task['marketplace']
+        if incremental and marketplace not in known_products:
+            with database_connection() as connection:
+                known_products[marketplace] = get_resolved_links(connection=connection, table=TABLES[marketplace])
+
+        # As métricas são zeradas por shard, para medir a vazão de cada um separadamente
+        metrics.reset()
+        start = time.perf_counter()
+        try:
+            with LeaseHeartbeat(queue, task_id, worker_id) as heartbeat:
+                frontier = queue.frontier(task.get('run'), task['id'])
+                scraper = build_scraper(task, options.get(marketplace, {}), frontier, known_products.get(marketplace))
+                df = scraper.main()
+            stats = shard_stats(task, scraper, df, time.perf_counter() - start)
+            # Sem a reserva, a tarefa pode já estar com outro worker: nem conclui nem guarda o resultado
+            completed = not heartbeat.lost and queue.complete(task_id, stats, worker_id)
+        except Exception as e:
+            logging.warning(f"Erro no shard {task['url']}: {e}")
+            if not queue.fail(task_id, e, worker_id):
+                logging.warning(f"Reserva do shard {task['url']} perdida; a falha não foi registrada")
+            continue
+
+        if not completed:
+            logging.warning(f"Reserva do shard {task['url']} perdida; o resultado é descartado, pois outro worker refaz o shard")
+            continue
+
+        logging.info(f"Shard {marketplace} {task['url']}: {stats['rows']} produtos em {stats['seconds']}s "
+                     f"({stats['rows_per_second']} produtos/s, {stats['requests']} requisições)")
+        results.append((df, stats))
+
+    return results
+
+
+def configure_worker_logging(level):
+    """Repete nos processos worker ('spawn'), que não herdam a configuração de log, o nível do processo principal."""
+    logging.basicConfig(level=level, format='%(asctime)s %(levelname)s %(message)s')
+
+
+def crawl_shards(queue, options, processes=2, incremental=True):
+    """
+    Roda 'processes' workers locais sobre a fila e junta o resultado deles. Outras máquinas podem
+    rodar workers sobre a mesma fila ao mesmo tempo; cada uma recebe apenas os shards que reservou.
+
+        Parâmetros:
+                queue (FileWorkQueue | DatabaseWorkQueue): Fila de tarefas.
+                options (dict): Argumentos de cada scraper, por marketplace.
+                processes (int): Quantidade de processos worker nesta máquina.
+                incremental (bool): Repassado para run_shard_worker.
+
+        Retorno:
+                dataframes (dict): Dataframe de cada marketplace, sem links repetidos.
+                stats (list): Estatísticas de cada shard processado nesta máquina.
+    """
+
+    # 'spawn': cada worker cria seu próprio pool de conexões, em vez de herdar as conexões abertas do pai
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context,
+                             initializer=configure_worker_logging, initargs=(logging.getLogger().level,)) as executor:
+        futures = [executor.submit(run_shard_worker, queue, options, None, incremental) for _ in range(processes)]
+        results = [result for future in futures for result in future.result()]
+
+    dataframes = {}
+    for marketplace in MARKETPLACES:
+        frames = [df for df, stats in results if stats['marketplace'] == marketplace]
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=SCHEMA)
+        dataframes[marketplace] = df.drop_duplicates(subset=['link'])
+
+    stats = [stats for _, stats in results]
+    for marketplace, df in dataframes.items():
+        shards = [item for item in stats if item['marketplace'] == marketplace]
+        seconds = sum(item['seconds'] for item in shards)
+        logging.info(f'{marketplace}: {len(df)} produtos em {len(shards)} shards ({seconds:.1f}s somados)')
+    return dataframes, stats
@@ -0,0 +1,57 @@
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
+
+
+def make_soup(content, parse_only=None):
+    """
+    Cria o objeto BeautifulSoup usando o lxml, bem mais rápido que o html.parser.
+    Com 'parse_only', apenas as tags de interesse (grade de produtos, tabela de especificações)
+    são montadas na árvore. Se o lxml não estiver instalado, usa o html.parser.
+
+        Parâmetros:
+                content (bytes): HTML da página.
+                parse_only (SoupStrainer): Filtro das tags que serão mantidas.
+
+        Retorno:
+                soup: Objeto BeautifulSoup.
+    """
+
+    try:
+        return BeautifulSoup(content, 'lxml', parse_only=parse_only)
+    except FeatureNotFound:
+        return BeautifulSoup(content, 'html.parser', parse_only=parse_only)
+
+
+BRAND_LABELS = ('marca', 'brand')
+
+
+def code_and_brand(specs, code_labels):
+    """
+    Obtém o código anatel e a marca a partir do mapa de especificações de um produto.
+
+        Parâmetros:
+                specs (dict): Especificações do produto (nome -> valor).
+                code_labels (list): Nomes usados pelo site para o código anatel.
+
+        Retorno:
+                code (str): Código anatel sem hífens, ou None.
+                brand (str): Marca do produto, ou None.
+    """
+
+    code = next((value for label, value in specs.items() if any(substring in label for substring in code_labels)), None)
+    brand = next((value for label, value in specs.items() if label.lower() in BRAND_LABELS), None)
+    return (code.replace('-', '') if code else None), brand or None
+
+
+# Americanas: cards da grade de produtos e botão de próxima página
+AMERICANAS_LISTING_STRAINER = SoupStrainer(['div', 'a'], class_=['col__StyledCol-sc-1snw5v3-0 qYCYL theme-grid-col',
+                                                                  'src__PageLink-sc-82ugau-3 exDCiw'])
+
+# Americanas: linhas da tabela de especificações (nome e valor na mesma linha), onde ficam o código anatel e a marca
+AMERICANAS_PRODUCT_STRAINER = SoupStrainer('tr')
+
+# Mercado Livre: cards da grade de produtos e links de paginação
+MERCADO_LIVRE_LISTING_STRAINER = SoupStrainer(['div', 'a'], class_=['andes-card ui-search-result ui-search-result--core andes-card--flat andes-card--padding-16',
+                                                                     'andes-pagination__link'])
+
+# Mercado Livre: tabelas de especificações (cabeçalhos, valores e a linha da marca)
+MERCADO_LIVRE_PRODUCT_STRAINER = SoupStrainer('table')
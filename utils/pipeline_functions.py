@@ -0,0 +1,113 @@
+import os
+import time
+import logging
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from utils.json_functions import load_json_file
+
+
+# Módulo e classe do scraper de cada marketplace, importados só quando o marketplace é coletado
+MARKETPLACES = {'americanas': ('utils.americanas_functions', 'Americanas'),
+                'mercado_livre': ('utils.mercado_livre_functions', 'MercadoLivre')}
+
+# Posição dos headers de cada marketplace no arquivo de credenciais e tabela de cada um no banco
+HEADERS_INDEX = {'americanas': 2, 'mercado_livre': 1}
+TABLES = {'americanas': 'americanas', 'mercado_livre': 'mercadoLivre'}
+
+
+def scraper_class(marketplace):
+    """Importa e retorna a classe do scraper do marketplace."""
+    if marketplace not in MARKETPLACES:
+        raise ValueError(f'Marketplace desconhecido: {marketplace}')
+    module, name = MARKETPLACES[marketplace]
+    return getattr(importlib.import_module(module), name)
+
+
+def load_headers(marketplace):
+    """Carrega os headers do marketplace do arquivo de credenciais, apenas quando a coleta vai começar."""
+    load_dotenv()
+    return load_json_file(os.getenv('credentials_path'))[HEADERS_INDEX[marketplace]]
+
+
+def crawl_marketplace(marketplace, url, options, resume=False, engine='threads'):
+    """
+    Coleta um marketplace e retorna seu dataframe e a duração da coleta.
+
+        Parâmetros:
+                marketplace (str): 'americanas' ou 'mercado_livre'.
+                url (str): URL da categoria.
+                options (dict): Argumentos do scraper (headers, num_threads, proxy_manager, cache...).
+                resume (bool): Continua a coleta a partir do último checkpoint.
+                engine (str): Motor de coleta: 'threads' ou 'async'.
+
+        Retorno:
+                df (pd.Dataframe): Produtos coletados.
+                seconds (float): Duração da coleta.
+    """
+
+    options = dict(options)
+    headers = options.pop('headers') if 'headers' in options else load_headers(marketplace)
+    scraper = scraper_class(marketplace)(url=url, headers=headers, **options)
+
+    start = time.perf_counter()
+    df = scraper.main(resume=resume, engine=engine)
+    return df, time.perf_counter() - start
+
+
+def run_pipeline(urls, options, resume=False, incremental=True, min_marketplaces=2, write=True, engine='threads'):
+    """
+    Coleta todos os marketplaces ao mesmo tempo, em threads do mesmo processo, compartilhando o limitador
+    de taxa, o gerenciador de proxies e o pool de conexões do banco. Quando todas as coletas terminam, o
+    cruzamento pelo código anatel é feito em memória e produtos e cruzamento são gravados em uma única transação.
+    O tempo total fica próximo ao da coleta mais lenta, e não à soma delas.
+
+        Parâmetros:
+                urls (dict): URL da categoria de cada marketplace.
+                options (dict): Argumentos de cada scraper, por marketplace.
+                resume (bool): Continua cada coleta a partir do seu último checkpoint.
+                incremental (bool): Carrega do banco os produtos já resolvidos de cada marketplace.
+                min_marketplaces (int): Repassado para match_marketplaces.
+                write (bool): Grava o resultado no banco.
+                engine (str): Motor de coleta de cada marketplace: 'threads' ou 'async'.
+
+        Retorno:
+                dataframes (dict): Dataframe de cada marketplace.
+                df_matching (pd.Dataframe): Resultado de match_marketplaces.
+    """
+
+    from utils.proxy_functions import ProxyManager
+    from utils.database_functions import database_connection, get_resolved_links, write_results
+    from utils.matching_functions import match_marketplaces
+
+    # Um único gerenciador de proxies: a saúde de cada proxy é medida pelas duas coletas
+    proxy_manager = ProxyManager.from_credentials()
+    options = {marketplace: {'proxy_manager': proxy_manager, **options.get(marketplace, {})} for marketplace in urls}
+
+    if incremental:
+        with database_connection() as connection:
+            for marketplace in urls:
+                options[marketplace].setdefault('known_products', get_resolved_links(connection=connection, table=TABLES[marketplace]))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+        futures = {marketplace: executor.submit(crawl_marketplace, marketplace, url, options[marketplace], resume, engine)
+                   for marketplace, url in urls.items()}
+        results = {marketplace: future.result() for marketplace, future in futures.items()}
+    elapsed = time.perf_counter() - start
+
+    dataframes = {marketplace: df for marketplace, (df, _) in results.items()}
+    durations = ', '.join(f'{marketplace} {seconds:.1f}s' for marketplace, (_, seconds) in results.items())
+    logging.info(f'Coletas concluídas em {elapsed:.1f}s ({durations})')
+
+    df_matching = match_marketplaces(dataframes, min_marketplaces=min_marketplaces)
+    logging.info(f'{len(df_matching)} códigos anatel em comum entre os marketplaces')
+
+    if write:
+        with database_connection() as connection:
+            write_results(connection=connection,
+                          df_americanas=dataframes['americanas'],
+                          df_ml=dataframes['mercado_livre'],
+                          df_matching=df_matching)
+
+    return dataframes, df_matching
@@ -0,0 +1,128 @@
+import os
+import random
+import threading
+import time
+from dotenv import load_dotenv
+from utils.json_functions import load_json_file
+from utils.metrics_functions import metrics, proxy_label
+
+
+class ProxyStats():
+    """Estatísticas de saúde de um único proxy."""
+
+    def __init__(self, proxy):
+        self.proxy = proxy
+        self.requests = 0
+        self.errors = 0
+        self.bans = 0
+        self.latency = None
+        self.consecutive_failures = 0
+        self.quarantined_until = 0
+        self.quarantines = 0
+
+    def health(self):
+        """Nota entre 0 e 1: taxa de sucesso suavizada dividida pela latência média."""
+        success_rate = (self.requests - self.errors - self.bans + 1) / (self.requests + 2)
+        latency = self.latency if self.latency is not None else 1.0
+        return max(success_rate, 0.01) / max(latency, 0.1)
+
+    def as_dict(self):
+        return {'proxy': self.proxy,
+                'requests': self.requests,
+                'errors': self.errors,
+                'bans': self.bans,
+                'latency': self.latency,
+                'health': self.health(),
+                'quarantined': self.quarantined_until > time.monotonic(),
+                'quarantines': self.quarantines}
+
+
+class ProxyManager():
+    """
+    Gerencia a lista de proxies, escolhendo cada proxy com probabilidade proporcional à sua saúde.
+    Proxies que falham 'max_failures' vezes seguidas ou que são banidos ficam em quarentena
+    (circuit breaker) por um tempo que dobra a cada nova quarentena.
+    """
+
+    def __init__(self, proxies, max_failures=3, quarantine_seconds=60, max_quarantine_seconds=900, latency_weight=0.3):
+        self.stats = {self.key(proxy): ProxyStats(proxy) for proxy in proxies}
+        self.max_failures = max_failures
+        self.quarantine_seconds = quarantine_seconds
+        self.max_quarantine_seconds = max_quarantine_seconds
+        self.latency_weight = latency_weight
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_credentials(cls, **kwargs):
+        """Cria o gerenciador com a lista de proxies do arquivo de credenciais."""
+        load_dotenv()
+        credentials_path = os.getenv('credentials_path')
+        credentials = load_json_file(credentials_path) if credentials_path else None
+        proxies = credentials[1].get('proxies', []) if credentials and len(credentials) > 1 else []
+        return cls(proxies, **kwargs)
+
+    @staticmethod
+    def key(proxy):
+        return tuple(sorted(proxy.items())) if proxy else None
+
+    def get_proxy(self, exclude=None):
+        """
+        Escolhe um proxy ponderando pela saúde de cada um.
+        Se todos estiverem em quarentena, usa o que sai dela primeiro. Sem proxies cadastrados, retorna None.
+        Os proxies em 'exclude' (já tentados em uma retentativa) só são usados se não houver outro disponível.
+        """
+        with self.lock:
+            if not self.stats:
+                return None
+
+            now = time.monotonic()
+            available = [s for s in self.stats.values() if s.quarantined_until <= now]
+            if exclude:
+                excluded = {self.key(proxy) for proxy in exclude}
+                available = [s for s in available if self.key(s.proxy) not in excluded] or available
+            if not available:
+                return min(self.stats.values(), key=lambda s: s.quarantined_until).proxy
+
+            weights = [s.health() for s in available]
+            return random.choices(available, weights=weights)[0].proxy
+
+    def report(self, proxy, latency=None, error=False, banned=False):
+        """
+        Registra o resultado de uma requisição feita através do proxy.
+
+            Parâmetros:
+                    proxy (dict): Proxy utilizado.
+                    latency (float): Tempo de resposta em segundos.
+                    error (bool): Se a requisição falhou (timeout, conexão recusada etc).
+                    banned (bool): Se o site respondeu com bloqueio ou captcha.
+        """
+        outcome = 'banned' if banned else 'error' if error else 'ok'
+        metrics.inc('proxy_requests_total', proxy=proxy_label(proxy), outcome=outcome)
+
+        key = self.key(proxy)
+        with self.lock:
+            stats = self.stats.get(key)
+            if stats is None:
+                return
+
+            stats.requests += 1
+            if latency is not None:
+                stats.latency = latency if stats.latency is None else (
+                    self.latency_weight * latency + (1 - self.latency_weight) * stats.latency)
+
+            if error or banned:
+                stats.errors += error
+                stats.bans += banned
+                stats.consecutive_failures += 1
+                if banned or stats.consecutive_failures >= self.max_failures:
+                    duration = min(self.max_quarantine_seconds, self.quarantine_seconds * 2 ** stats.quarantines)
+                    stats.quarantined_until = time.monotonic() + duration
+                    stats.quarantines += 1
+                    stats.consecutive_failures = 0
+            else:
+                stats.consecutive_failures = 0
+
+    def get_stats(self):
+        """Retorna as estatísticas de todos os proxies, do mais saudável para o menos saudável."""
+        with self.lock:
+            return sorted((s.as_dict() for s in self.stats.values()), key=lambda s: s['health'], reverse=True)
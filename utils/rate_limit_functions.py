@@ -0,0 +1,138 @@
+import asyncio
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+# Status HTTP que indicam que o site está limitando ou bloqueando as requisições.
+BLOCK_STATUS_CODES = (429, 503)
+
+# Trechos de HTML que indicam uma página de captcha ou verificação anti-bot. Só são procurados em
+# respostas de erro: uma página de produto (200) pode citar 'captcha' em um script ou na descrição.
+CAPTCHA_MARKERS = (b'captcha', b'account-verification', b'are you a robot', b'acesso negado')
+
+# Em respostas 200, só o endereço final, o título ou um formulário de desafio indicam bloqueio.
+CHALLENGE_URL_MARKERS = ('account-verification', 'captcha')
+CHALLENGE_TITLES = ('captcha', 'are you a robot', 'acesso negado', 'verificação de segurança', 'account verification')
+TITLE_PATTERN = re.compile(rb'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+CHALLENGE_FORM_PATTERN = re.compile(rb'<form[^>]*(captcha|challenge|account-verification)', re.IGNORECASE)
+
+
+def is_challenge_page(response):
+    """
+    Verifica se uma resposta 200 é uma página de desafio anti-bot, pelo endereço final
+    (redirecionamento para a verificação), pelo título ou por um formulário de captcha.
+    """
+
+    url = (response.url or '').lower()
+    if any(marker in url for marker in CHALLENGE_URL_MARKERS):
+        return True
+
+    head = response.content[:20000]
+    title = TITLE_PATTERN.search(head)
+    if title is not None:
+        title = title.group(1).decode('utf-8', errors='replace').strip().lower()
+        if any(marker in title for marker in CHALLENGE_TITLES):
+            return True
+    return CHALLENGE_FORM_PATTERN.search(head) is not None
+
+
+def is_blocked_response(response):
+    """
+    Verifica se a resposta indica bloqueio por parte do site (429/503 ou página de captcha).
+
+        Parâmetros:
+                response (requests.Response): Resposta da requisição.
+
+        Retorno:
+                True se a resposta parece um bloqueio, False caso contrário.
+    """
+
+    if response.status_code in BLOCK_STATUS_CODES:
+        return True
+    if response.status_code == 200:
+        return is_challenge_page(response)
+
+    content = response.content[:20000].lower()
+    return any(marker in content for marker in CAPTCHA_MARKERS)
+
+
+class TokenBucket():
+    """Balde de tokens de um único host, com taxa ajustável."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Reserva um token e retorna quantos segundos é preciso esperar até ele estar disponível."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            return 0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class RateLimiter():
+    """
+    Limitador de taxa adaptativo, com um balde de tokens por host.
+    A taxa de cada host cresce aos poucos enquanto as respostas são saudáveis e cai pela metade
+    quando o site responde com 429/503 ou uma página de captcha.
+    """
+
+    def __init__(self, initial_rate=1.0, min_rate=0.2, max_rate=10.0, burst=2, increase=0.05, decrease=0.5, host_rates=None):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.host_rates = host_rates or {}
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def get_bucket(self, url):
+        """Retorna o balde de tokens do host da URL, criando-o se necessário."""
+        host = urlsplit(url).netloc
+        with self.lock:
+            if host not in self.buckets:
+                rate = self.host_rates.get(host, self.initial_rate)
+                self.buckets[host] = TokenBucket(rate=rate, capacity=self.burst)
+            return self.buckets[host]
+
+    def acquire(self, url):
+        """Bloqueia a thread atual até que o host da URL permita uma nova requisição."""
+        wait = self.get_bucket(url).reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, url):
+        """Versão assíncrona de acquire: espera sem bloquear o event loop."""
+        wait = self.get_bucket(url).reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def feedback(self, url, response):
+        """Ajusta a taxa do host de acordo com a resposta recebida."""
+        bucket = self.get_bucket(url)
+        with bucket.lock:
+            if is_blocked_response(response):
+                bucket.rate = max(self.min_rate, bucket.rate * self.decrease)
+                # Esvazia o balde para que a próxima requisição já respeite a nova taxa
+                bucket.tokens = min(bucket.tokens, 0)
+            else:
+                bucket.rate = min(self.max_rate, bucket.rate + self.increase)
+
+    def rates(self):
+        """Retorna a taxa atual (requisições por segundo) de cada host."""
+        with self.lock:
+            return {host: bucket.rate for host, bucket in self.buckets.items()}
+
+
+# Limitador compartilhado por todos os scrapers do processo.
+rate_limiter = RateLimiter(host_rates={'www.americanas.com.br': 1 / 3})
@@ -0,0 +1,178 @@
+import random
+import threading
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from utils.http_functions import fetch
+from utils.rate_limit_functions import is_blocked_response
+
+
+# Classificação do resultado de uma requisição
+SUCCESS = 'success'
+RETRY = 'retry'
+BLOCKED = 'blocked'
+FATAL = 'fatal'
+
+
+def classify_error(response=None, exception=None):
+    """
+    Classifica o resultado de uma requisição para decidir se vale tentar de novo.
+
+        Parâmetros:
+                response (requests.Response): Resposta recebida, se houver.
+                exception (Exception): Exceção lançada pela requisição, se houver.
+
+        Retorno:
+                SUCCESS, RETRY (timeout, conexão, 5xx), BLOCKED (429/503/captcha, trocar de proxy)
+                ou FATAL (4xx e erros que não melhoram com nova tentativa).
+    """
+
+    if exception is not None:
+        # Timeouts, conexões recusadas e erros de proxy costumam passar em uma nova tentativa
+        if isinstance(exception, (requests.RequestException, TimeoutError, OSError)):
+            return RETRY
+        return FATAL
+
+    if is_blocked_response(response):
+        return BLOCKED
+    if response.status_code >= 500:
+        return RETRY
+    if response.status_code >= 400:
+        return FATAL
+    return SUCCESS
+
+
+def raise_for_outcome(response):
+    """
+    Lança requests.HTTPError para uma resposta que não foi classificada como SUCCESS,
+    para que o erro chegue a 'failed_links' e à paginação em vez de ser tratado como página válida.
+    """
+
+    response.raise_for_status()
+    raise requests.HTTPError(f'Resposta bloqueada ({response.status_code}) para {response.url}', response=response)
+
+
+class RetryBudget():
+    """Quantidade máxima de retentativas de uma execução, compartilhada entre as threads."""
+
+    def __init__(self, max_retries=300):
+        self.remaining = max_retries
+        self.lock = threading.Lock()
+
+    def consume(self):
+        """Consome uma retentativa do orçamento. Retorna False se o orçamento acabou."""
+        with self.lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+class RetryPolicy():
+    """
+    Política de retentativas com backoff exponencial e jitter ("full jitter").
+    Cada nova tentativa usa um proxy diferente e consome o orçamento da execução.
+    Com 'hedge_after', uma segunda requisição (por outro proxy) é disparada se a primeira
+    demorar mais que esse número de segundos, e vale a que responder primeiro.
+    """
+
+    def __init__(self, max_attempts=3, base_delay=0.5, max_delay=30, budget=None, hedge_after=None, hedge_workers=8):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget()
+        self.hedge_after = hedge_after
+        self.hedge_executor = ThreadPoolExecutor(max_workers=hedge_workers) if hedge_after else None
+
+    def delay(self, attempt, blocked=False):
+        """Tempo de espera antes da tentativa 'attempt'. Bloqueios esperam o dobro."""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** attempt * (2 if blocked else 1))
+        return random.uniform(0, ceiling)
+
+
+def run_in_thread(function):
+    """Roda 'function' em uma thread própria e retorna um Future com o resultado."""
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(function())
+        except Exception as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+def future_outcome(future):
+    """Classificação (classify_error) do resultado de um Future já concluído."""
+    if future.exception() is not None:
+        return classify_error(exception=future.exception())
+    return classify_error(response=future.result())
+
+
+def hedged_fetch(url, headers, policy, proxy_manager=None, tried=None, **fetch_kwargs):
+    """
+    Faz a requisição e, se ela passar de 'policy.hedge_after' segundos, dispara uma segunda
+    por outro proxy; vale a primeira das duas classificada como SUCCESS. A primeira roda em uma
+    thread própria, e só a segunda vai para o pool de hedge, que assim não limita a quantidade de
+    requisições em andamento. Se as duas falharem, vale o resultado da primeira.
+    """
+
+    def attempt():
+        proxies = proxy_manager.get_proxy(exclude=tried) if proxy_manager is not None else None
+        if tried is not None and proxies is not None:
+            tried.append(proxies)
+        return fetch(url, headers, proxies=proxies, proxy_manager=proxy_manager, **fetch_kwargs)
+
+    if policy.hedge_executor is None:
+        return attempt()
+
+    primary = run_in_thread(attempt)
+    done, _ = wait([primary], timeout=policy.hedge_after)
+    if done:
+        return primary.result()
+
+    pending = {primary, policy.hedge_executor.submit(attempt)}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future_outcome(future) == SUCCESS:
+                return future.result()
+    return primary.result()
+
+
+def fetch_with_retry(url, headers, policy, proxy_manager=None, **fetch_kwargs):
+    """
+    Realiza a requisição aplicando a política de retentativas.
+
+        Parâmetros:
+                url (str): URL que será requisitada.
+                headers (dict): Headers da requisição.
+                policy (RetryPolicy): Política de retentativas.
+                proxy_manager (ProxyManager): Gerenciador de proxies; cada tentativa usa um proxy diferente.
+                fetch_kwargs: Demais parâmetros repassados para utils.http_functions.fetch.
+
+        Retorno:
+                response (requests.Response): Resposta classificada como SUCCESS. Se as tentativas ou o orçamento
+                acabarem, ou a resposta for um erro definitivo (4xx), relança a última exceção ou lança requests.HTTPError.
+    """
+
+    tried = []
+    for attempt in range(policy.max_attempts):
+        response, exception = None, None
+        try:
+            response = hedged_fetch(url, headers, policy, proxy_manager=proxy_manager, tried=tried, **fetch_kwargs)
+        except Exception as e:
+            exception = e
+
+        outcome = classify_error(response=response, exception=exception)
+        last_attempt = attempt == policy.max_attempts - 1
+        if outcome in (SUCCESS, FATAL) or last_attempt or not policy.budget.consume():
+            if exception is not None:
+                raise exception
+            if outcome != SUCCESS:
+                raise_for_outcome(response)
+            return response
+
+        time.sleep(policy.delay(attempt, blocked=outcome == BLOCKED))
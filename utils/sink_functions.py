@@ -0,0 +1,185 @@
+import os
+import csv
+import json
+import threading
+from collections import namedtuple
+
+
+# Esquema compartilhado pelos marketplaces
+SCHEMA = ['marketplace', 'title', 'price', 'link', 'code', 'brand', 'specs']
+
+# Registro compacto de um produto (uma tupla, em vez de um dicionário por linha).
+# Código, marca e especificações ficam vazios até a página do produto ser processada.
+ProductRecord = namedtuple('ProductRecord', SCHEMA, defaults=(None, None, None))
+
+
+def is_valid_record(record):
+    """Mesmo filtro aplicado ao dataframe final: produto com código ANATEL e preço positivo."""
+    return record.code is not None and record.code != 'Null' and record.price is not None and record.price > 0
+
+
+def serialize_record(record):
+    """Converte as especificações (dicionário) em texto JSON para gravação em arquivo."""
+    if record.specs is None:
+        return record
+    return record._replace(specs=json.dumps(record.specs, ensure_ascii=False))
+
+
+# Tipos das colunas de texto na leitura do CSV: sem isso o pandas converte códigos como '0123' em números
+CSV_DTYPES = {'marketplace': str, 'title': str, 'link': str, 'code': str, 'brand': str, 'specs': str}
+
+
+class CsvSink():
+    """
+    Grava os produtos em um arquivo CSV, em lotes de 'batch_size' linhas.
+    O arquivo é aberto em modo de acréscimo, então uma coleta retomada continua o mesmo arquivo.
+    A posição no arquivo (retornada por flush) vai para o checkpoint, e rollback volta o arquivo a ela.
+    """
+
+    def __init__(self, path, batch_size=500):
+        self.path = path
+        self.batch_size = batch_size
+        self.buffer = []
+        self.lock = threading.Lock()
+
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, 'a', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        if new_file:
+            self.writer.writerow(SCHEMA)
+
+    def write(self, record):
+        with self.lock:
+            self.buffer.append(record)
+            if len(self.buffer) >= self.batch_size:
+                self.flush_buffer()
+
+    def flush_buffer(self):
+        self.writer.writerows(serialize_record(record) for record in self.buffer)
+        self.file.flush()
+        self.buffer = []
+
+    def flush(self):
+        """Grava o lote pendente e retorna a posição atual do arquivo."""
+        with self.lock:
+            self.flush_buffer()
+            return self.file.tell()
+
+    def rollback(self, position):
+        """Descarta o que foi gravado depois de 'position' (linhas concluídas após o último checkpoint)."""
+        with self.lock:
+            self.buffer = []
+            self.file.truncate(position)
+
+    def close(self):
+        with self.lock:
+            self.flush_buffer()
+            self.file.close()
+
+    def read(self, start=0, chunksize=50000):
+        """
+        Lê de volta, em dataframes de até 'chunksize' linhas, o que foi gravado a partir da posição 'start'.
+        """
+        import pandas as pd
+
+        with open(self.path, 'rb') as file:
+            file.seek(start)
+            yield from pd.read_csv(file, header=0 if start == 0 else None, names=SCHEMA, dtype=CSV_DTYPES, chunksize=chunksize)
+
+
+class ParquetSink():
+    """
+    Grava os produtos em um diretório de arquivos Parquet, um arquivo ('part-00000.parquet', ...) por lote.
+    Uma coleta retomada continua a numeração dos arquivos existentes. O diretório pode ser lido
+    de uma só vez com pd.read_parquet(directory). Requer o pyarrow.
+    A posição (número do próximo arquivo, retornado por flush) vai para o checkpoint, e rollback volta a ela.
+    """
+
+    def __init__(self, directory, batch_size=5000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError('O pyarrow é necessário para gravar em Parquet. Instale-o ou use um arquivo .csv.')
+
+        self.pq = pq
+        self.pa = pa
+        self.schema = pa.schema([('marketplace', pa.string()),
+                                 ('title', pa.string()),
+                                 ('price', pa.float64()),
+                                 ('link', pa.string()),
+                                 ('code', pa.string()),
+                                 ('brand', pa.string()),
+                                 ('specs', pa.string())])
+        self.directory = directory
+        self.batch_size = batch_size
+        self.buffer = []
+        self.lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self.part = len([name for name in os.listdir(directory) if name.endswith('.parquet')])
+
+    def write(self, record):
+        with self.lock:
+            self.buffer.append(record)
+            if len(self.buffer) >= self.batch_size:
+                self.flush_buffer()
+
+    def flush_buffer(self):
+        if not self.buffer:
+            return
+
+        columns = list(zip(*(serialize_record(record) for record in self.buffer)))
+        table = self.pa.table({name: list(values) for name, values in zip(SCHEMA, columns)}, schema=self.schema)
+        self.pq.write_table(table, self.part_path(self.part))
+        self.part += 1
+        self.buffer = []
+
+    def part_path(self, part):
+        return os.path.join(self.directory, f'part-{part:05d}.parquet')
+
+    def flush(self):
+        """Grava o lote pendente e retorna o número do próximo arquivo."""
+        with self.lock:
+            self.flush_buffer()
+            return self.part
+
+    def rollback(self, position):
+        """Apaga os arquivos gravados depois de 'position' (linhas concluídas após o último checkpoint)."""
+        with self.lock:
+            self.buffer = []
+            for part in range(position, self.part):
+                if os.path.exists(self.part_path(part)):
+                    os.remove(self.part_path(part))
+            self.part = position
+
+    def close(self):
+        with self.lock:
+            self.flush_buffer()
+
+    def read(self, start=0, chunksize=None):
+        """Lê de volta, um dataframe por arquivo (um lote cada), o que foi gravado a partir do arquivo 'start'."""
+        part = start
+        while os.path.exists(self.part_path(part)):
+            yield self.pq.read_table(self.part_path(part)).to_pandas()
+            part += 1
+
+
+def open_sink(path, batch_size=None):
+    """
+    Cria o sink de acordo com o caminho: arquivos '.csv' usam o CsvSink; qualquer outro caminho
+    é tratado como um diretório de arquivos Parquet.
+
+        Parâmetros:
+                path (str): Arquivo CSV ou diretório Parquet.
+                batch_size (int): Quantidade de linhas por lote. Por padrão, o padrão de cada sink.
+
+        Retorno:
+                sink (CsvSink | ParquetSink): Sink com os métodos write(record), flush(), rollback(position),
+                close() e read(start).
+    """
+
+    kwargs = {'batch_size': batch_size} if batch_size else {}
+    if path.endswith('.csv'):
+        return CsvSink(path, **kwargs)
+    return ParquetSink(path, **kwargs)
@@ -0,0 +1,392 @@
+import os
+import json
+import time
+import uuid
+import fcntl
+import logging
+import threading
+from utils.frontier_functions import Frontier, canonicalize_url
+from utils.database_functions import database_connection
+
+
+class FileWorkQueue():
+    """
+    Fila de tarefas em um diretório (local ou compartilhado entre máquinas).
+    Cada tarefa é um arquivo JSON que passa por 'pending/', 'running/' e 'done/' (ou 'failed/').
+    A tarefa é reservada com os.rename, que é atômico: só um worker consegue mover o arquivo.
+    Tarefas em 'running/' há mais de 'lease_seconds' sem renovação (worker que caiu) voltam a ser reservadas;
+    enquanto o shard roda, o worker renova a reserva com um LeaseHeartbeat.
+    """
+
+    def __init__(self, directory, lease_seconds=600, max_attempts=3):
+        self.directory = directory
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        for state in ('pending', 'running', 'done', 'failed'):
+            os.makedirs(os.path.join(directory, state), exist_ok=True)
+
+    def path(self, state, task_id):
+        return os.path.join(self.directory, state, f'{task_id}.json')
+
+    def write(self, path, task):
+        temporary_path = f'{path}.tmp'
+        with open(temporary_path, 'w', encoding='utf-8') as file:
+            json.dump(task, file, ensure_ascii=False)
+        os.replace(temporary_path, path)
+
+    def put(self, task):
+        """Acrescenta uma tarefa à fila e retorna seu id. Os ids crescem com o tempo, mantendo a ordem de inclusão."""
+        task_id = f'{time.time_ns()}-{uuid.uuid4().hex[:8]}'
+        self.write(self.path('pending', task_id), {**task, 'attempts': 0})
+        return task_id
+
+    def requeue_stale(self):
+        """Devolve para 'pending/' as tarefas reservadas há mais de 'lease_seconds'."""
+        now = time.time()
+        for name in os.listdir(os.path.join(self.directory, 'running')):
+            # Arquivos que não terminam em '.json' estão sendo concluídos por um worker
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, 'running', name)
+            try:
+                if now - os.path.getmtime(path) > self.lease_seconds:
+                    os.rename(path, os.path.join(self.directory, 'pending', name))
+            except FileNotFoundError:
+                continue
+
+    def claim(self, worker):
+        """Reserva a próxima tarefa pendente. Retorna (id, tarefa) ou None se a fila estiver vazia."""
+        self.requeue_stale()
+        for name in sorted(os.listdir(os.path.join(self.directory, 'pending'))):
+            if not name.endswith('.json'):
+                continue
+
+            task_id = name[:-len('.json')]
+            running_path = self.path('running', task_id)
+            try:
+                # O horário do arquivo marca o início da reserva: é atualizado antes de o arquivo ir para 'running/',
+                # senão o requeue_stale de outro worker veria a data de inclusão e devolveria a tarefa para a fila
+                os.utime(self.path('pending', task_id))
+                os.rename(self.path('pending', task_id), running_path)
+                with open(running_path, encoding='utf-8') as file:
+                    task = json.load(file)
+            except FileNotFoundError:
+                # Outro worker reservou a tarefa primeiro
+                continue
+
+            # Grava o dono da reserva
+            task['worker'] = worker
+            self.write(running_path, task)
+            return task_id, task
+        return None
+
+    def renew(self, task_id, worker):
+        """Renova a reserva da tarefa. Retorna False se ela não pertence mais ao worker (reserva vencida)."""
+        try:
+            with open(self.path('running', task_id), encoding='utf-8') as file:
+                if json.load(file).get('worker') != worker:
+                    return False
+            os.utime(self.path('running', task_id))
+            return True
+        except (FileNotFoundError, ValueError):
+            return False
+
+    def release(self, task_id, worker):
+        """
+        Retira a tarefa de 'running/' para concluí-la. O arquivo é renomeado para um nome só deste worker,
+        então ele não é devolvido à fila no meio da conclusão. Retorna a tarefa, ou None se a reserva foi perdida.
+        """
+        running_path = self.path('running', task_id)
+        releasing_path = f'{running_path}.{worker}'
+        try:
+            os.rename(running_path, releasing_path)
+        except FileNotFoundError:
+            return None
+
+        with open(releasing_path, encoding='utf-8') as file:
+            task = json.load(file)
+        if task.get('worker') != worker:
+            # A tarefa voltou para a fila e foi reservada por outro worker
+            os.rename(releasing_path, running_path)
+            return None
+        return task
+
+    def complete(self, task_id, result, worker=None):
+        """
+        Marca a tarefa como concluída, guardando o resultado (estatísticas do shard).
+        Retorna False, sem alterar a tarefa, se a reserva do worker foi perdida.
+        """
+        task = self.release(task_id, worker)
+        if task is None:
+            return False
+        self.write(self.path('done', task_id), {**task, 'result': result})
+        os.remove(f"{self.path('running', task_id)}.{worker}")
+        return True
+
+    def fail(self, task_id, error, worker=None):
+        """
+        Devolve a tarefa para a fila ou, depois de 'max_attempts' tentativas, a move para 'failed/'.
+        Retorna False, sem alterar a tarefa, se a reserva do worker foi perdida.
+        """
+        task = self.release(task_id, worker)
+        if task is None:
+            return False
+        task['attempts'] = task.get('attempts', 0) + 1
+        task['error'] = str(error)
+        state = 'failed' if task['attempts'] >= self.max_attempts else 'pending'
+        self.write(self.path(state, task_id), task)
+        os.remove(f"{self.path('running', task_id)}.{worker}")
+        return True
+
+    def results(self):
+        """Resultados das tarefas concluídas, na ordem de inclusão."""
+        results = []
+        for name in sorted(os.listdir(os.path.join(self.directory, 'done'))):
+            if name.endswith('.json'):
+                with open(os.path.join(self.directory, 'done', name), encoding='utf-8') as file:
+                    results.append(json.load(file).get('result'))
+        return results
+
+    def frontier(self, run, shard):
+        """
+        Fronteira compartilhada pelos workers que usam esta fila, uma por geração ('run', criada a cada
+        enfileiramento): uma nova coleta das mesmas categorias admite de novo os produtos já vistos.
+        """
+        os.makedirs(os.path.join(self.directory, 'frontier'), exist_ok=True)
+        return FileFrontier(os.path.join(self.directory, 'frontier', f'{run}.txt'), shard)
+
+
+class DatabaseWorkQueue():
+    """
+    Fila de tarefas em uma tabela do Postgres, para workers em várias máquinas.
+    A reserva usa 'FOR UPDATE SKIP LOCKED', então workers concorrentes nunca pegam a mesma tarefa.
+    Reservas não renovadas (LeaseHeartbeat) por mais de 'lease_seconds' voltam a ser reservadas.
+    """
+
+    def __init__(self, table='crawl_tasks', lease_seconds=600, max_attempts=3):
+        if not table.isidentifier():
+            raise ValueError(f'Nome de tabela inválido: {table}')
+        self.table = table
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+    def create_table(self):
+        with database_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(f"""CREATE TABLE IF NOT EXISTS {self.table} (
+                                       id SERIAL PRIMARY KEY,
+                                       task JSONB NOT NULL,
+                                       status TEXT NOT NULL DEFAULT 'pending',
+                                       worker TEXT,
+                                       attempts INTEGER NOT NULL DEFAULT 0,
+                                       result JSONB,
+                                       error TEXT,
+                                       claimed_at TIMESTAMP,
+                                       finished_at TIMESTAMP)""")
+                cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{self.table}_status ON {self.table} (status, id)')
+            connection.commit()
+
+    def put(self, task):
+        with database_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(f'INSERT INTO {self.table} (task) VALUES (%s) RETURNING id', (json.dumps(task),))
+                task_id = cursor.fetchone()[0]
+            connection.commit()
+        return task_id
+
+    def claim(self, worker):
+        """Reserva a próxima tarefa pendente (ou com a reserva vencida). Retorna (id, tarefa) ou None."""
+        with database_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(f"""UPDATE {self.table} SET status = 'running', worker = %s, claimed_at = NOW()
+                                   WHERE id = (SELECT id FROM {self.table}
+                                               WHERE status = 'pending'
+                                                  OR (status = 'running' AND claimed_at < NOW() - %s * INTERVAL '1 second')
+                                               ORDER BY id
+                                               FOR UPDATE SKIP LOCKED
+                                               LIMIT 1)
+                                   RETURNING id, task""", (worker, self.lease_seconds))
+                row = cursor.fetchone()
+            connection.commit()
+
+        if row is None:
+            return None
+        task_id, task = row
+        return task_id, {**task, 'worker': worker}
+
+    def renew(self, task_id, worker):
+        """Renova a reserva da tarefa. Retorna False se ela não pertence mais ao worker (reserva vencida)."""
+        with database_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(f"""UPDATE {self.table} SET claimed_at = NOW()
+                                   WHERE id = %s AND status = 'running' AND worker = %s""", (task_id, worker))
+                renewed = cursor.rowcount == 1
+            connection.commit()
+        return renewed
+
+    def complete(self, task_id, result, worker=None):
+        """Marca a tarefa como concluída. Retorna False, sem alterar a tarefa, se a reserva do worker foi perdida."""
+        with database_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(f"""UPDATE {self.table} SET status = 'done', result = %s, finished_at = NOW()
+                                   WHERE id = %s AND status = 'running' AND worker = %s""", (json.dumps(result), task_id, worker))
+                completed = cursor.rowcount == 1
+            connection.commit()
+        return completed
+
+    def fail(self, task_id, error, worker=None):
+        """Devolve a tarefa para a fila (ou a marca como 'failed'). Retorna False se a reserva do worker foi perdida."""
+        with database_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(f"""UPDATE {self.table}
+                                   SET attempts = attempts + 1, error = %s,
+                                       status = CASE WHEN attempts + 1 >= %s THEN 'failed' ELSE 'pending' END
+                                   WHERE id = %s AND status = 'running' AND worker = %s""", (str(error), self.max_attempts, task_id, worker))
+                failed = cursor.rowcount == 1
+            connection.commit()
+        return failed
+
+    def results(self):
+        with database_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT result FROM {self.table} WHERE status = 'done' ORDER BY id")
+                return [row[0] for row in cursor.fetchall()]
+
+    def frontier(self, run, shard):
+        """Fronteira compartilhada pelos workers que usam esta fila, uma por geração ('run') das tarefas."""
+        return DatabaseFrontier(f'{self.table}_frontier', run, shard)
+
+
+class LeaseHeartbeat():
+    """
+    Renova a reserva de uma tarefa a cada terço do 'lease_seconds' da fila, enquanto o shard roda, para que
+    um shard longo não volte para a fila. Se a renovação falhar (a reserva venceu e a tarefa foi
+    devolvida à fila), o worker é avisado por 'lost' e o resultado do shard é descartado.
+    """
+
+    def __init__(self, queue, task_id, worker):
+        self.queue = queue
+        self.task_id = task_id
+        self.worker = worker
+        self.lost = False
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        while not self.stopped.wait(self.queue.lease_seconds / 3):
+            try:
+                renewed = self.queue.renew(self.task_id, self.worker)
+            except Exception as e:
+                logging.warning(f'Erro ao renovar a reserva da tarefa {self.task_id}: {e}')
+                continue
+            if not renewed:
+                logging.warning(f'Reserva da tarefa {self.task_id} perdida pelo worker {self.worker}')
+                self.lost = True
+                return
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+
+
+class FileFrontier(Frontier):
+    """
+    Fronteira compartilhada entre processos por um arquivo de links (uma linha 'shard<TAB>link' por link).
+    Cada admissão trava o arquivo (flock), lê apenas as linhas acrescentadas por outros
+    processos desde a última leitura e acrescenta o link, se ele for novo.
+    Um link que já pertence ao próprio shard é admitido de novo, para que a nova tentativa de um shard que falhou
+    colete os produtos que ele mesmo havia admitido.
+    """
+
+    def __init__(self, path, shard=None):
+        super().__init__()
+        self.path = path
+        self.shard = str(shard)
+        self.owners = {}
+        self.offset = 0
+
+    def admit(self, url):
+        canonical = canonicalize_url(url)
+        with self.lock:
+            if canonical in self.seen:
+                return None
+
+            with open(self.path, 'a+', encoding='utf-8') as file:
+                fcntl.flock(file, fcntl.LOCK_EX)
+                try:
+                    file.seek(self.offset)
+                    for line in file:
+                        shard, _, link = line.rstrip('\n').partition('\t')
+                        self.owners.setdefault(link, shard)
+
+                    self.offset = file.tell()
+
+                    owner = self.owners.get(canonical)
+                    if owner is None:
+                        try:
+                            os.write(file.fileno(), f'{self.shard}\t{canonical}\n'.encode('utf-8'))
+                        except OSError:
+                            # Desfaz uma linha gravada pela metade; o link não é marcado como visto
+                            os.ftruncate(file.fileno(), self.offset)
+                            raise
+                        self.offset = os.fstat(file.fileno()).st_size
+                        self.owners[canonical] = self.shard
+                    elif owner != self.shard:
+                        return None
+                finally:
+                    fcntl.flock(file, fcntl.LOCK_UN)
+
+            self.seen.add(canonical)
+            return canonical
+
+
+class DatabaseFrontier(Frontier):
+    """
+    Fronteira compartilhada por uma tabela com chave única (geração, link): o link é admitido pelo shard que
+    conseguir inseri-lo, ou de novo pelo mesmo shard, na nova tentativa de um shard que falhou.
+    """
+
+    def __init__(self, table='crawl_tasks_frontier', run=None, shard=None):
+        super().__init__()
+        if not table.isidentifier():
+            raise ValueError(f'Nome de tabela inválido: {table}')
+        self.table = table
+        self.run = str(run)
+        self.shard = str(shard)
+        with database_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(f"""CREATE TABLE IF NOT EXISTS {self.table} (
+                                       run TEXT NOT NULL,
+                                       link TEXT NOT NULL,
+                                       shard TEXT NOT NULL,
+                                       admitted_at TIMESTAMP DEFAULT NOW(),
+                                       PRIMARY KEY (run, link))""")
+            connection.commit()
+
+    def admit(self, url):
+        canonical = canonicalize_url(url)
+        with self.lock:
+            if canonical in self.seen:
+                return None
+            self.seen.add(canonical)
+
+        # Em conflito, a linha só é devolvida (admitida) se o link já pertence a este shard
+        try:
+            with database_connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"""INSERT INTO {self.table} (run, link, shard) VALUES (%s, %s, %s)
+                                       ON CONFLICT (run, link) DO UPDATE SET admitted_at = {self.table}.admitted_at
+                                       WHERE {self.table}.shard = EXCLUDED.shard
+                                       RETURNING link""", (self.run, canonical, self.shard))
+                    admitted = cursor.fetchone() is not None
+                connection.commit()
+        except Exception:
+            # O link só fica como visto depois de gravado na tabela, para ser admitido em uma nova tentativa
+            with self.lock:
+                self.seen.discard(canonical)
+            raise
+        return canonical if admitted else None